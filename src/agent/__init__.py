@@ -1,3 +1,6 @@
+from importlib import import_module
+from typing import Any
+
 from src.agent.state import (
     AgentState,
     ChangePlan,
@@ -15,7 +18,6 @@ from src.agent.state import (
     TestResult,
     TypeCheckResult,
 )
-from src.agent.graph import build_graph, graph
 
 __all__ = [
     "AgentState",
@@ -36,3 +38,9 @@ __all__ = [
     "build_graph",
     "graph",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in ("build_graph", "graph"):
+        return getattr(import_module("src.agent.graph"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,6 @@
-from typing import Literal
+from functools import cache
+from types import MappingProxyType
+from typing import Any, Literal
 
 from langgraph.graph import END, StateGraph
 
@@ -17,9 +19,7 @@ from src.agent.state import AgentState, RunStatus, TaskType
 
 
 def should_continue(state: AgentState) -> Literal["continue", "end"]:
-    if state.errors:
-        return "end"
-    if state.retry_count > 2:
+    if state.is_terminal:
         return "end"
     return "continue"
 
@@ -46,18 +46,12 @@ def route_after_scoring(state: AgentState) -> Literal["explain", "end"]:
     return "explain"
 
 
+@cache
 def build_graph():
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("ingest_repo", ingest_repo)
-    workflow.add_node("retrieve_context", retrieve_context_node)
-    workflow.add_node("plan_change", plan_change)
-    workflow.add_node("generate_patch", generate_patch)
-    workflow.add_node("apply_patch", apply_patch_sandbox)
-    workflow.add_node("run_checks", run_checks)
-    workflow.add_node("score_change", score_change)
-    workflow.add_node("explain_diff", explain_diff)
-    workflow.add_node("escalate_finalize", escalate_or_finalize)
+    for name, node in _NODE_DISPATCH.items():
+        workflow.add_node(name, node)
 
     workflow.set_entry_point("ingest_repo")
 
@@ -105,4 +99,23 @@ async def retrieve_context_node(state: AgentState) -> AgentState:
         return await retrieve_context(state, db)
 
 
-graph = build_graph()
+_NODE_DISPATCH = MappingProxyType(
+    {
+        "ingest_repo": ingest_repo,
+        "retrieve_context": retrieve_context_node,
+        "plan_change": plan_change,
+        "generate_patch": generate_patch,
+        "apply_patch": apply_patch_sandbox,
+        "run_checks": run_checks,
+        "score_change": score_change,
+        "explain_diff": explain_diff,
+        "escalate_finalize": escalate_or_finalize,
+    }
+)
+
+
+def __getattr__(name: str) -> Any:
+    # Compiled on first use (the API lifespan warms it), not as an import side effect.
+    if name == "graph":
+        return build_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,17 @@
-from src.agent.nodes.ingest_repo import ingest_repo
-from src.agent.nodes.retrieve_context import retrieve_context
-from src.agent.nodes.plan_change import plan_change
-from src.agent.nodes.generate_patch import generate_patch
-from src.agent.nodes.apply_patch import apply_patch_sandbox
-from src.agent.nodes.run_checks import run_checks
-from src.agent.nodes.score_change import score_change
-from src.agent.nodes.explain_diff import explain_diff
-from src.agent.nodes.escalate_finalize import escalate_or_finalize
+from importlib import import_module
+from typing import Any
+
+_NODE_MODULES = {
+    "ingest_repo": "src.agent.nodes.ingest_repo",
+    "retrieve_context": "src.agent.nodes.retrieve_context",
+    "plan_change": "src.agent.nodes.plan_change",
+    "generate_patch": "src.agent.nodes.generate_patch",
+    "apply_patch_sandbox": "src.agent.nodes.apply_patch",
+    "run_checks": "src.agent.nodes.run_checks",
+    "score_change": "src.agent.nodes.score_change",
+    "explain_diff": "src.agent.nodes.explain_diff",
+    "escalate_or_finalize": "src.agent.nodes.escalate_finalize",
+}
 
 __all__ = [
     "ingest_repo",
@@ -19,3 +24,11 @@ __all__ = [
     "explain_diff",
     "escalate_or_finalize",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _NODE_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_NODE_MODULES[name]), name)
+    globals()[name] = value
+    return value
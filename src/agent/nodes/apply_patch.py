@@ -1,9 +1,16 @@
+import asyncio
+from functools import cache
 from pathlib import Path
 
 from src.agent.state import AgentState
 from src.sandbox.executor import PatchApplier
 
 
+@cache
+def _get_patch_applier() -> PatchApplier:
+    return PatchApplier()
+
+
 async def apply_patch_sandbox(
     state: AgentState,
     patch_applier: PatchApplier | None = None,
@@ -11,7 +18,7 @@ async def apply_patch_sandbox(
     if state.errors or not state.generated_diff:
         return state
 
-    patch_applier = patch_applier or PatchApplier()
+    patch_applier = patch_applier or _get_patch_applier()
 
     repo_path = Path(state.repo_path)
 
@@ -21,10 +28,13 @@ async def apply_patch_sandbox(
         state.errors.extend(validation.errors)
         return state
 
-    result = patch_applier.apply_patch(
+    # Docker and git calls block; keep them off the event loop so concurrent runs can proceed.
+    result = await asyncio.to_thread(
+        patch_applier.apply_patch,
         repo_path=repo_path,
         diff_content=state.generated_diff,
         sandbox_id=state.sandbox_id,
+        validation=validation,
     )
 
     state.patch_result = result
@@ -1,4 +1,4 @@
-from datetime import datetime
+import time
 
 from src.agent.state import AgentState, Decision, RunStatus
 from src.db.audit import AuditLogger
@@ -8,7 +8,7 @@ async def escalate_or_finalize(
     state: AgentState,
     audit_logger: AuditLogger | None = None,
 ) -> AgentState:
-    state.completed_at = datetime.utcnow()
+    state.completed_at_ns = time.time_ns()
 
     if state.errors:
         state.status = RunStatus.FAILED
@@ -22,7 +22,7 @@ async def escalate_or_finalize(
             event_type="RUN_COMPLETED",
             event_data={
                 "status": state.status,
-                "decision": state.decision.value if state.decision else None,
+                "decision": state.decision,
                 "quality_score": state.quality_score,
                 "risk_score": state.risk_score,
                 "errors": state.errors,
@@ -25,7 +25,12 @@ async def explain_diff(
 
     check_summary = _format_check_summary(state.check_results)
 
-    prompt = f"""Explain the following code changes:
+    cached_prefix = f"""Diff:
+```
+{state.generated_diff}
+```"""
+
+    prompt = f"""Explain the code changes in the diff above.
 
 Task: {state.task_description}
 
@@ -33,11 +38,6 @@ Decision: {state.decision}
 Quality Score: {state.quality_score}
 Risk Score: {state.risk_score}
 
-Diff:
-```
-{state.generated_diff}
-```
-
 Validation Results:
 {check_summary}
 
@@ -47,7 +47,9 @@ Provide a clear, concise explanation of the changes."""
         state.explanation = await llm.generate(
             prompt=prompt,
             system_prompt=SYSTEM_PROMPT,
-            temperature=0.1,
+            temperature=0.0,
+            cached_prefix=cached_prefix,
+            semantic_cache=True,
         )
     except Exception as e:
         state.explanation = f"Failed to generate explanation: {e}"
@@ -61,10 +63,9 @@ def _format_check_summary(check_results: dict) -> str:
     if not check_results:
         return "No validation results available."
 
-    lines = []
-    for name, result in check_results.items():
-        status = "✓ PASSED" if result.passed else "✗ FAILED"
-        errors = f" ({result.error_count} errors, {result.warning_count} warnings)"
-        lines.append(f"- {name}: {status}{errors if not result.passed else ''}")
-
-    return "\n".join(lines)
+    return "\n".join(
+        f"- {name}: ✓ PASSED"
+        if result.passed
+        else f"- {name}: ✗ FAILED ({result.error_count} errors, {result.warning_count} warnings)"
+        for name, result in check_results.items()
+    )
@@ -1,10 +1,15 @@
+import asyncio
+import re
+from collections import defaultdict
 from pathlib import Path
 from typing import Any
 
 from src.agent.state import AgentState
-from src.agent.tools.diff_generator import DiffGenerator
+from src.agent.tools.diff_generator import get_diff_generator
 from src.config import settings
 
+_HUNK_RANGE_RE = re.compile(r"@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+
 
 async def generate_patch(
     state: AgentState,
@@ -12,13 +17,17 @@ async def generate_patch(
     if state.errors or not state.change_plan:
         return state
 
-    diff_generator = DiffGenerator()
-    all_diffs: list[str] = []
+    diff_generator = get_diff_generator()
     repo_path = Path(state.repo_path)
+    semaphore = asyncio.Semaphore(settings.max_concurrent_llm)
+
+    chunks_by_file: dict[str, list[Any]] = defaultdict(list)
+    for chunk in state.retrieved_chunks:
+        chunks_by_file[chunk.file_path].append(chunk)
 
-    for change in state.change_plan.changes:
+    async def _gen_one(change: Any) -> tuple[str | None, str | None]:
         file_path = Path(change.file_path)
-        
+
         if file_path.is_absolute():
             full_path = file_path
             relative_path = str(file_path.relative_to(repo_path)) if file_path.is_relative_to(repo_path) else file_path.name
@@ -27,38 +36,48 @@ async def generate_patch(
             relative_path = change.file_path
 
         if not full_path.exists():
-            state.errors.append(f"File not found: {change.file_path}")
-            continue
+            return None, f"File not found: {change.file_path}"
 
         try:
-            current_content = full_path.read_text(encoding="utf-8")
+            current_content = await asyncio.to_thread(full_path.read_text, encoding="utf-8")
         except Exception as e:
-            state.errors.append(f"Failed to read {change.file_path}: {e}")
-            continue
+            return None, f"Failed to read {change.file_path}: {e}"
 
-        context = _build_context(state.retrieved_chunks, str(full_path))
+        context = _build_context(chunks_by_file, str(full_path))
 
         try:
-            diff = await diff_generator.generate_diff(
-                file_path=relative_path,
-                current_content=current_content,
-                description=change.description,
-                context=context,
-            )
+            async with semaphore:
+                diff = await diff_generator.generate_diff(
+                    file_path=relative_path,
+                    current_content=current_content,
+                    description=change.description,
+                    context=context,
+                )
+        except Exception as e:
+            return None, f"Failed to generate diff for {change.file_path}: {e}"
 
-            if diff:
-                all_diffs.append(diff)
+        return diff or None, None
 
-        except Exception as e:
-            state.errors.append(f"Failed to generate diff for {change.file_path}: {e}")
+    results = await asyncio.gather(
+        *[_gen_one(change) for change in state.change_plan.changes],
+        return_exceptions=True,
+    )
+
+    all_diffs: list[str] = []
+    for change, result in zip(state.change_plan.changes, results, strict=True):
+        if isinstance(result, BaseException):
+            state.errors.append(f"Failed to generate diff for {change.file_path}: {result}")
             continue
+        diff, error = result
+        if error:
+            state.errors.append(error)
+        if diff:
+            all_diffs.append(diff)
 
     if all_diffs:
         state.generated_diff = "\n\n".join(all_diffs)
 
-        total_lines = sum(
-            diff.count("\n+") + diff.count("\n-") for diff in all_diffs
-        )
+        total_lines = _count_changed_lines(state.generated_diff)
         if total_lines > settings.max_diff_lines:
             state.errors.append(
                 f"Generated diff too large: {total_lines} lines > {settings.max_diff_lines}"
@@ -70,8 +89,31 @@ async def generate_patch(
     return state
 
 
-def _build_context(chunks: list[Any], file_path: str) -> str:
-    relevant = [c for c in chunks if c.file_path == file_path]
+def _count_changed_lines(diff: str) -> int:
+    # Hunk bodies are walked by their header counts, so only the ---/+++ file headers are
+    # skipped; removing a "-- x" line shows up as "--- x" inside a hunk and still counts.
+    changed = 0
+    old_left = new_left = 0
+    for line in diff.split("\n"):
+        if old_left > 0 or new_left > 0:
+            prefix = line[:1]
+            if prefix == "-":
+                old_left -= 1
+                changed += 1
+            elif prefix == "+":
+                new_left -= 1
+                changed += 1
+            elif prefix != "\\":
+                old_left -= 1
+                new_left -= 1
+        elif match := _HUNK_RANGE_RE.match(line):
+            old_left = int(match.group(1) or 1)
+            new_left = int(match.group(2) or 1)
+    return changed
+
+
+def _build_context(chunks_by_file: dict[str, list[Any]], file_path: str) -> str:
+    relevant = chunks_by_file.get(file_path, [])
 
     if not relevant:
         return "No additional context available."
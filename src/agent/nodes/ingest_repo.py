@@ -1,18 +1,18 @@
-import subprocess
-from datetime import datetime
+import asyncio
+import time
 from pathlib import Path
 from typing import Any
 
-from sqlalchemy import select
-
 from src.agent.state import AgentState, RunStatus
-from src.db.models import async_session, Repository
-from src.indexing.filters import FileFilter, filter_files
+from src.indexing.filters import FileFilter, filter_files_with_size
+
+
+_ingest_cache: dict[tuple[str, str], tuple[list[dict[str, Any]], int, str | None]] = {}
 
 
 async def ingest_repo(state: AgentState) -> AgentState:
     state.status = RunStatus.RUNNING
-    state.started_at = datetime.utcnow()
+    state.started_at_ns = time.time_ns()
 
     repo_path = Path(state.repo_path)
 
@@ -21,47 +21,83 @@ async def ingest_repo(state: AgentState) -> AgentState:
         state.status = RunStatus.FAILED
         return state
 
-    try:
-        commit_result = subprocess.run(
-            ["git", "rev-parse", "HEAD"],
-            cwd=str(repo_path),
-            capture_output=True,
-            text=True,
-        )
-        if commit_result.returncode == 0:
-            state.commit_sha = commit_result.stdout.strip()
+    commit_sha, branch, worktree_status = await asyncio.gather(
+        _git_output(repo_path, "rev-parse", "HEAD"),
+        _git_output(repo_path, "rev-parse", "--abbrev-ref", "HEAD"),
+        _git_output(repo_path, "status", "--porcelain"),
+    )
 
-        branch_result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            cwd=str(repo_path),
-            capture_output=True,
-            text=True,
+    if commit_sha:
+        state.commit_sha = commit_sha
+    if branch:
+        state.branch = branch
+
+    # Uncommitted edits change the file list without moving HEAD, so only a clean tree is cached.
+    clean = worktree_status == ""
+    cache_key = (str(repo_path.resolve()), commit_sha) if commit_sha and clean else None
+    cached = _ingest_cache.get(cache_key) if cache_key else None
+
+    if cached:
+        file_index, total_size, repo_id = cached
+        if not repo_id:
+            repo_id = await _lookup_repo_id(repo_path.name)
+    else:
+        file_filter = FileFilter(repo_path)
+        (file_index, total_size), repo_id = await asyncio.gather(
+            asyncio.to_thread(filter_files_with_size, repo_path, file_filter),
+            _lookup_repo_id(repo_path.name),
         )
-        if branch_result.returncode == 0:
-            state.branch = branch_result.stdout.strip()
-    except Exception:
-        pass
 
-    file_filter = FileFilter(repo_path)
-    state.file_index = filter_files(repo_path, file_filter)
+    if cache_key:
+        for key in [k for k in _ingest_cache if k[0] == cache_key[0] and k != cache_key]:
+            del _ingest_cache[key]
+        _ingest_cache[cache_key] = (file_index, total_size, repo_id)
+
+    state.file_index = [dict(entry) for entry in file_index] if cache_key else file_index
+    if repo_id:
+        state.repo_id = repo_id
 
     state.repo_metadata = {
         "path": str(repo_path),
         "commit_sha": state.commit_sha,
         "branch": state.branch,
-        "file_count": len(state.file_index),
-        "total_size": sum(f.get("size", 0) for f in state.file_index),
+        "file_count": len(file_index),
+        "total_size": total_size,
     }
 
+    return state
+
+
+async def _git_output(repo_path: Path, *args: str) -> str | None:
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            cwd=str(repo_path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+    except Exception:
+        return None
+
+    if process.returncode != 0:
+        return None
+
+    return stdout.decode().strip()
+
+
+async def _lookup_repo_id(name: str) -> str | None:
+    from sqlalchemy import select
+
+    from src.db.models import Repository, async_session
+
     async with async_session() as db:
         result = await db.execute(
             select(Repository)
-            .where(Repository.name == repo_path.name)
+            .where(Repository.name == name)
             .order_by(Repository.created_at.desc())
             .limit(1)
         )
         repo = result.scalar_one_or_none()
-        if repo:
-            state.repo_id = str(repo.id)
-
-    return state
+        return str(repo.id) if repo else None
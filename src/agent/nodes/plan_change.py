@@ -1,6 +1,7 @@
-import json
+import re
 from typing import Any
 
+import orjson
 from pydantic import BaseModel
 
 from src.agent.state import AgentState, ChangePlan, PlannedChange
@@ -44,7 +45,12 @@ OUTPUT: JSON with the following structure:
     "estimated_impact": "low|medium|high"
 }
 
-IMPORTANT: Only use file paths that exist in the Code Context section above. Do not invent or use placeholder paths."""
+IMPORTANT: Only use file paths that exist in the Code Context section. Do not invent or use placeholder paths."""
+
+
+CONTEXT_CHUNK_TEMPLATE = "File: {file_path}\nSymbol: {symbol_name}\nLines: {start_line}-{end_line}\n```\n{content}\n```\n"
+
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*(.*?)\s*(?:```\s*)?\Z", re.DOTALL)
 
 
 async def plan_change(
@@ -56,23 +62,24 @@ async def plan_change(
 
     llm = llm or LLMClient()
 
-    context_parts = []
-    for chunk in state.retrieved_chunks[:10]:
-        context_parts.append(
-            f"File: {chunk.file_path}\n"
-            f"Symbol: {chunk.symbol_name or 'module'}\n"
-            f"Lines: {chunk.start_line}-{chunk.end_line}\n"
-            f"```\n{chunk.content}\n```\n"
+    chunks = sorted(state.retrieved_chunks[:10], key=lambda c: c.id)
+    context = "\n---\n".join(
+        CONTEXT_CHUNK_TEMPLATE.format(
+            file_path=chunk.file_path,
+            symbol_name=chunk.symbol_name or "module",
+            start_line=chunk.start_line,
+            end_line=chunk.end_line,
+            content=chunk.content,
         )
+        for chunk in chunks
+    ) or "No relevant code context found. Analyze the repository structure."
 
-    context = "\n---\n".join(context_parts) if context_parts else "No relevant code context found. Analyze the repository structure."
+    cached_prefix = f"""Code Context:
+{context}"""
 
     prompt = f"""Task: {state.task_description}
 Task Type: {state.task_type}
 
-Code Context:
-{context}
-
 Affected Files: {', '.join(state.affected_files) if state.affected_files else 'All relevant files'}
 
 Create a structured change plan. Output JSON only."""
@@ -82,22 +89,17 @@ Create a structured change plan. Output JSON only."""
             prompt=prompt,
             system_prompt=SYSTEM_PROMPT,
             temperature=0.1,
+            cached_prefix=cached_prefix,
         )
 
         if not response or not response.strip():
             state.errors.append("LLM returned empty response")
             return state
 
-        response_text = response.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        match = _FENCE_RE.match(response)
+        response_text = match.group(1) if match else response.strip()
 
-        plan_data = json.loads(response_text)
+        plan_data = orjson.loads(response_text)
 
         state.change_plan = ChangePlan(
             description=plan_data.get("description", ""),
@@ -125,7 +127,7 @@ Create a structured change plan. Output JSON only."""
 
         state.affected_files = state.change_plan.files_to_modify
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         state.errors.append(f"Failed to parse plan: {e}")
     except Exception as e:
         state.errors.append(f"Failed to generate plan: {e}")
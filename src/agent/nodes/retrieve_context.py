@@ -1,10 +1,16 @@
+from functools import cache
 from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.agent.state import AgentState, CodeChunk
 from src.agent.tools.vector_search import VectorSearch
-from src.indexing.embedder import Embedder
+from src.indexing.embedder import create_embedder
+
+
+@cache
+def _get_vector_search() -> VectorSearch:
+    return VectorSearch(create_embedder())
 
 
 async def retrieve_context(
@@ -15,7 +21,7 @@ async def retrieve_context(
     if state.errors:
         return state
 
-    vector_search = VectorSearch(Embedder())
+    vector_search = _get_vector_search()
 
     try:
         results = await vector_search.search(
@@ -1,7 +1,14 @@
+from functools import cache
+
 from src.agent.state import AgentState, Decision
 from src.scoring.engine import ScoringEngine
 
 
+@cache
+def _get_scoring_engine() -> ScoringEngine:
+    return ScoringEngine()
+
+
 async def score_change(
     state: AgentState,
 ) -> AgentState:
@@ -9,7 +16,7 @@ async def score_change(
         state.decision = Decision.REJECT
         return state
 
-    engine = ScoringEngine()
+    engine = _get_scoring_engine()
 
     result = engine.compute_scores(
         check_results=state.check_results,
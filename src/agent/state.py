@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import UTC, datetime
 from enum import Enum
 from typing import Any
 import uuid
@@ -24,7 +24,7 @@ class RunStatus(str, Enum):
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeChunk:
     id: str
     file_path: str
@@ -42,7 +42,7 @@ class CodeChunk:
     complexity_score: int | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ChangePlan:
     description: str
     files_to_modify: list[str]
@@ -52,7 +52,7 @@ class ChangePlan:
     estimated_impact: str
 
 
-@dataclass
+@dataclass(slots=True)
 class PlannedChange:
     file_path: str
     change_type: str
@@ -60,7 +60,7 @@ class PlannedChange:
     affected_symbols: list[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class CheckDetail:
     file_path: str
     line: int
@@ -70,20 +70,20 @@ class CheckDetail:
     rule_id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CheckResult:
     check_name: str
     passed: bool
     output: str
     error_count: int
     warning_count: int
-    details: list[CheckDetail]
+    details: list[CheckDetail] = field(default_factory=list, kw_only=True)
     duration_ms: int
     timestamp: datetime
     has_critical_failure: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class TestResult:
     total_tests: int
     passed: int
@@ -94,7 +94,7 @@ class TestResult:
     test_files: list[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class LintResult:
     total_issues: int
     errors: int
@@ -103,7 +103,7 @@ class LintResult:
     details: list[CheckDetail]
 
 
-@dataclass
+@dataclass(slots=True)
 class TypeCheckResult:
     errors: int
     warnings: int
@@ -111,7 +111,7 @@ class TypeCheckResult:
     details: list[CheckDetail]
 
 
-@dataclass
+@dataclass(slots=True)
 class SecurityResult:
     critical: int
     high: int
@@ -121,7 +121,7 @@ class SecurityResult:
     details: list[CheckDetail]
 
 
-@dataclass
+@dataclass(slots=True)
 class PatchResult:
     success: bool
     sandbox_id: str | None = None
@@ -129,7 +129,7 @@ class PatchResult:
     files_modified: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Scores:
     quality_score: float
     risk_score: float
@@ -140,7 +140,7 @@ class Scores:
     has_hard_gate_failure: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class RiskAssessment:
     combined_score: float
     diff_size_risk: float
@@ -152,7 +152,7 @@ class RiskAssessment:
     flags: list[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentState:
     run_id: str
     repo_path: str
@@ -197,8 +197,20 @@ class AgentState:
     retry_count: int = 0
 
     status: RunStatus = RunStatus.PENDING
-    started_at: datetime | None = None
-    completed_at: datetime | None = None
+    started_at_ns: int | None = None
+    completed_at_ns: int | None = None
+
+    @property
+    def is_terminal(self) -> bool:
+        return bool(self.errors) or self.retry_count > 2
+
+    @property
+    def started_at(self) -> datetime | None:
+        return _from_ns(self.started_at_ns)
+
+    @property
+    def completed_at(self) -> datetime | None:
+        return _from_ns(self.completed_at_ns)
 
     @classmethod
     def create(cls, repo_path: str, task_type: TaskType, task_description: str) -> "AgentState":
@@ -209,3 +221,9 @@ class AgentState:
             task_description=task_description,
             status=RunStatus.PENDING,
         )
+
+
+def _from_ns(value: int | None) -> datetime | None:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1_000_000_000, tz=UTC)
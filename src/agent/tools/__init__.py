@@ -1,12 +1,29 @@
-from src.agent.tools.diff_generator import DiffGenerator, DiffGenerationRequest, format_diff_for_display
-from src.agent.tools.llm import LLMClient, llm_client
+from typing import Any
+
+from src.agent.tools.diff_generator import (
+    DiffGenerationRequest,
+    DiffGenerator,
+    format_diff_for_display,
+    get_diff_generator,
+)
+from src.agent.tools.llm import LLMClient, SemanticLLMCache
 from src.agent.tools.vector_search import VectorSearch
 
 __all__ = [
     "LLMClient",
     "llm_client",
+    "SemanticLLMCache",
     "VectorSearch",
     "DiffGenerator",
     "DiffGenerationRequest",
     "format_diff_for_display",
+    "get_diff_generator",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name == "llm_client":
+        from src.agent.tools import llm
+
+        return llm.llm_client
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,84 @@
+import asyncio
+import hashlib
 import re
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
 from dataclasses import dataclass
+from functools import cache
 from typing import Any
 
 from pydantic import BaseModel
 
 from src.agent.tools.llm import LLMClient
+from src.config import settings
+
+_HUNK_HEADER_RE = re.compile(r"@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+_SEGMENT_STARTS = ("@@", "---", "diff --git")
+
+
+class _DiffExtractor:
+    """Pulls the diff out of a model response that may arrive in pieces.
+
+    The diff is the body of the first ```diff fence, or everything from the first line
+    starting with --- or diff --git up to a closing fence. A response with neither is
+    taken whole.
+    """
+
+    def __init__(self, normalize: Callable[[str], str]):
+        self._normalize = normalize
+        self._response: list[str] = []
+        self._buffer = ""
+        self._mode = "search"
+        self._segment: list[str] = []
+        self._started = False
+
+    def feed(self, text: str) -> list[str]:
+        self._response.append(text)
+        *lines, self._buffer = (self._buffer + text).split("\n")
+        ready: list[str] = []
+        for line in lines:
+            ready.extend(self._take(line))
+        return ready
+
+    def finish(self) -> list[str]:
+        ready = self._take(self._buffer) if self._buffer else []
+        self._buffer = ""
+        if self._mode == "search":
+            return self._normalize("".join(self._response).strip()).split("\n")
+
+        while self._segment and not self._segment[-1].strip():
+            self._segment.pop()
+        ready.extend(self._flush())
+        return ready
+
+    def _take(self, line: str) -> list[str]:
+        if self._mode == "search":
+            if line.startswith("```diff"):
+                self._mode = "fenced"
+                return []
+            if not line.startswith(("---", "diff --git")):
+                return []
+            self._mode = "bare"
+        elif self._mode in ("fenced", "bare") and line.startswith("```"):
+            self._mode = "done"
+            return []
+        elif self._mode == "done":
+            return []
+
+        if not self._started and not line.strip():
+            return []
+        self._started = True
+
+        ready = self._flush() if line.startswith(_SEGMENT_STARTS) else []
+        self._segment.append(line)
+        return ready
+
+    def _flush(self) -> list[str]:
+        # A segment is a hunk or a run of header lines; normalizing one never looks past it.
+        if not self._segment:
+            return []
+        segment, self._segment = self._segment, []
+        return self._normalize("\n".join(segment)).split("\n")
 
 
 @dataclass
@@ -34,18 +108,21 @@ RULES:
 4. Do not add comments explaining the diff
 5. Keep changes minimal and focused
 6. Preserve existing code style and formatting
-7. Do not modify unrelated code"""
+7. Do not modify unrelated code
 
-    DIFF_PROMPT = """Generate a unified diff for the following change request.
+INPUT:
+The first message contains the file path and its current content.
+The last message contains the requested change and any additional context.
+Generate the unified diff for that file only."""
 
-File: {file_path}
+    FILE_PROMPT = """File: {file_path}
 
 Current content:
 ```
 {current_content}
-```
+```"""
 
-Requested change:
+    DIFF_PROMPT = """Requested change:
 {description}
 
 Additional context:
@@ -53,8 +130,11 @@ Additional context:
 
 Output the unified diff:"""
 
+    CACHE_SIZE = 128
+
     def __init__(self, llm: LLMClient | None = None):
         self.llm = llm or LLMClient()
+        self._cache: OrderedDict[str, str] = OrderedDict()
 
     async def generate_diff(
         self,
@@ -63,9 +143,17 @@ Output the unified diff:"""
         description: str,
         context: str | None = None,
     ) -> str:
-        prompt = self.DIFF_PROMPT.format(
+        cache_key = self._cache_key(file_path, current_content, description, context)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+
+        cached_prefix = self.FILE_PROMPT.format(
             file_path=file_path,
             current_content=current_content,
+        )
+        prompt = self.DIFF_PROMPT.format(
             description=description,
             context=context or "No additional context provided.",
         )
@@ -74,32 +162,73 @@ Output the unified diff:"""
             prompt=prompt,
             system_prompt=self.SYSTEM_PROMPT,
             temperature=0.0,
+            cached_prefix=cached_prefix,
         )
 
-        diff = self._extract_diff(response)
-        return self._normalize_hunk_headers(diff)
-
-    def _extract_diff(self, response: str) -> str:
-        diff_pattern = r"```diff\n(.*?)\n```"
-        match = re.search(diff_pattern, response, re.DOTALL)
+        extractor = _DiffExtractor(self._normalize_hunk_headers)
+        diff = "\n".join([*extractor.feed(response), *extractor.finish()])
 
-        if match:
-            return match.group(1).strip()
+        self._cache[cache_key] = diff
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
 
-        if response.startswith("---") or response.startswith("diff --git"):
-            return response.strip()
+        return diff
 
-        lines = response.split("\n")
-        diff_lines = []
-        in_diff = False
+    async def generate_diff_stream(
+        self,
+        file_path: str,
+        current_content: str,
+        description: str,
+        context: str | None = None,
+    ) -> AsyncIterator[str]:
+        cache_key = self._cache_key(file_path, current_content, description, context)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            if cached:
+                for line in cached.split("\n"):
+                    yield line
+            return
+
+        cached_prefix = self.FILE_PROMPT.format(
+            file_path=file_path,
+            current_content=current_content,
+        )
+        prompt = self.DIFF_PROMPT.format(
+            description=description,
+            context=context or "No additional context provided.",
+        )
 
-        for line in lines:
-            if line.startswith("---") or line.startswith("diff --git"):
-                in_diff = True
-            if in_diff:
-                diff_lines.append(line)
+        # Lines are released one completed hunk at a time, already normalized, so the
+        # stream matches what generate_diff returns and what gets cached.
+        extractor = _DiffExtractor(self._normalize_hunk_headers)
+        lines: list[str] = []
 
-        return "\n".join(diff_lines).strip() if diff_lines else response.strip()
+        async for token in self.llm.stream(
+            prompt=prompt,
+            system_prompt=self.SYSTEM_PROMPT,
+            temperature=0.0,
+            cached_prefix=cached_prefix,
+        ):
+            for line in extractor.feed(token):
+                lines.append(line)
+                yield line
+
+        for line in extractor.finish():
+            lines.append(line)
+            yield line
+
+        self._cache[cache_key] = "\n".join(lines)
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _cache_key(file_path: str, current_content: str, description: str, context: str | None) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (file_path, current_content, description, context or ""):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
 
     def _normalize_hunk_headers(self, diff: str) -> str:
         lines = diff.split("\n")
@@ -118,24 +247,25 @@ Output the unified diff:"""
                 
                 cleaned_hunk = self._clean_hunk(hunk_lines)
                 
-                removed = sum(1 for l in cleaned_hunk if l.startswith("-") and not l.startswith("---"))
-                added = sum(1 for l in cleaned_hunk if l.startswith("+") and not l.startswith("+++"))
-                context = sum(1 for l in cleaned_hunk if not l.startswith(("+", "-")))
+                removed = added = context = 0
+                for hunk_line in cleaned_hunk:
+                    head = hunk_line[:3]
+                    prefix = head[:1]
+                    if prefix == "-":
+                        if head != "---":
+                            removed += 1
+                    elif prefix == "+":
+                        if head != "+++":
+                            added += 1
+                    else:
+                        context += 1
                 
-                match = re.match(r"@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@", line)
-                if match:
+                if match := _HUNK_HEADER_RE.match(line):
                     old_start = int(match.group(1))
                     new_start = int(match.group(2))
                     old_count = removed + context
                     new_count = added + context
                     
-                    if old_count == 0:
-                        old_count = 1
-                        old_start = 1
-                    if new_count == 0:
-                        new_count = 1
-                        new_start = 1
-                    
                     result.append(f"@@ -{old_start},{old_count} +{new_start},{new_count} @@")
                 else:
                     result.append(line)
@@ -149,12 +279,14 @@ Output the unified diff:"""
     def _clean_hunk(self, hunk_lines: list[str]) -> list[str]:
         cleaned = []
         for line in hunk_lines:
-            if line.startswith(("+", "-")) and not line.startswith(("+++", "---")):
+            head = line[:3]
+            prefix = head[:1]
+            if (prefix == "+" or prefix == "-") and head != "+++" and head != "---":
                 content = line[1:]
                 stripped = content.rstrip()
                 if stripped == "" and content != "":
                     continue
-                cleaned.append(line[0] + stripped)
+                cleaned.append(prefix + stripped)
             elif line == "" or line == " ":
                 cleaned.append("")
             else:
@@ -166,32 +298,58 @@ Output the unified diff:"""
         self,
         files: list[DiffGenerationRequest],
     ) -> str:
-        diffs = []
+        semaphore = asyncio.Semaphore(settings.max_concurrent_llm)
+
+        async def _generate(file_req: DiffGenerationRequest) -> str:
+            async with semaphore:
+                return await self.generate_diff(
+                    file_path=file_req.file_path,
+                    current_content=file_req.current_content,
+                    description=file_req.description,
+                    context=file_req.context,
+                )
 
-        for file_req in files:
-            diff = await self.generate_diff(
-                file_path=file_req.file_path,
-                current_content=file_req.current_content,
-                description=file_req.description,
-                context=file_req.context,
-            )
-            diffs.append(diff)
+        diffs = await asyncio.gather(*(_generate(file_req) for file_req in files))
 
         return "\n\n".join(diffs)
 
 
+@cache
+def get_diff_generator() -> DiffGenerator:
+    # Shared so the per-instance diff cache is reused across graph runs and API requests.
+    return DiffGenerator()
+
+
+_GREEN = b"\x1b[32m"
+_RED = b"\x1b[31m"
+_CYAN = b"\x1b[36m"
+_RESET = b"\x1b[0m"
+
+
 def format_diff_for_display(diff: str) -> str:
-    lines = diff.split("\n")
-    formatted_lines = []
-
-    for line in lines:
-        if line.startswith("+") and not line.startswith("+++"):
-            formatted_lines.append(f"\033[32m{line}\033[0m")
-        elif line.startswith("-") and not line.startswith("---"):
-            formatted_lines.append(f"\033[31m{line}\033[0m")
-        elif line.startswith("@@"):
-            formatted_lines.append(f"\033[36m{line}\033[0m")
+    out = bytearray()
+    first = True
+
+    for line in diff.encode().split(b"\n"):
+        if not first:
+            out += b"\n"
+        first = False
+
+        head = line[:3]
+        prefix = head[:1]
+        if prefix == b"+" and head != b"+++":
+            out += _GREEN
+            out += line
+            out += _RESET
+        elif prefix == b"-" and head != b"---":
+            out += _RED
+            out += line
+            out += _RESET
+        elif head[:2] == b"@@":
+            out += _CYAN
+            out += line
+            out += _RESET
         else:
-            formatted_lines.append(line)
+            out += line
 
-    return "\n".join(formatted_lines)
+    return out.decode()
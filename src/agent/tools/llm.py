@@ -1,8 +1,128 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from functools import cache
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import httpx
 from openai import AsyncOpenAI
 from pydantic import BaseModel
 
 from src.config import settings
 
+_response_cache: OrderedDict[str, str] = OrderedDict()
+_openai_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str | None], AsyncOpenAI]] = (
+    WeakKeyDictionary()
+)
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_key(payload: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_get(key: str) -> str | None:
+    value = _response_cache.get(key)
+    if value is None:
+        cache_stats["misses"] += 1
+        return None
+    _response_cache.move_to_end(key)
+    cache_stats["hits"] += 1
+    return value
+
+
+def _cache_set(key: str, value: str) -> None:
+    _response_cache[key] = value
+    if len(_response_cache) > settings.llm_cache_size:
+        _response_cache.popitem(last=False)
+
+
+def _new_openai_client(api_key: str, base_url: str | None) -> AsyncOpenAI:
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(600.0, connect=5.0),
+        ),
+    )
+
+
+def get_openai_client(api_key: str, base_url: str | None = None) -> AsyncOpenAI:
+    # Pooled connections belong to the event loop that opened them, so each running loop
+    # gets its own client; it is released along with the loop.
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _new_openai_client(api_key, base_url)
+
+    clients = _openai_clients.setdefault(loop, {})
+    client = clients.get((api_key, base_url))
+    if client is None:
+        client = clients[(api_key, base_url)] = _new_openai_client(api_key, base_url)
+    return client
+
+
+class SemanticLLMCache:
+    def __init__(self, threshold: float | None = None, embedder: Any | None = None):
+        self.threshold = threshold if threshold is not None else settings.llm_cache_similarity_threshold
+        self._embedder = embedder
+
+    @property
+    def embedder(self) -> Any:
+        if self._embedder is None:
+            from src.indexing.embedder import create_embedder
+
+            self._embedder = create_embedder()
+        return self._embedder
+
+    async def lookup(self, model: str, text: str) -> tuple[str | None, list[float] | None]:
+        from pgvector.sqlalchemy import Vector
+        from sqlalchemy import bindparam
+        from sqlalchemy import text as sql_text
+
+        from src.db.models import async_session
+
+        try:
+            embedding = await self.embedder.embed_single(text)
+            async with async_session() as db:
+                result = await db.execute(
+                    sql_text("""
+                        SELECT response, 1 - (embedding <=> :embedding) AS similarity
+                        FROM llm_response_cache
+                        WHERE model = :model
+                        ORDER BY embedding <=> :embedding
+                        LIMIT 1
+                    """).bindparams(bindparam("embedding", type_=Vector(settings.embedding_dimensions))),
+                    {"embedding": embedding, "model": model},
+                )
+                row = result.first()
+        except Exception:
+            return None, None
+
+        if row and float(row.similarity) >= self.threshold:
+            return row.response, embedding
+        return None, embedding
+
+    async def store(self, model: str, text: str, embedding: list[float], response: str) -> None:
+        from src.db.models import LLMResponseCache, async_session
+
+        try:
+            async with async_session() as db:
+                db.add(
+                    LLMResponseCache(
+                        model=model,
+                        prompt_hash=hashlib.sha256(text.encode()).hexdigest(),
+                        embedding=embedding,
+                        response=response,
+                    )
+                )
+                await db.commit()
+        except Exception:
+            pass
+
 
 class LLMClient:
     def __init__(
@@ -10,13 +130,34 @@ class LLMClient:
         model: str | None = None,
         api_key: str | None = None,
         base_url: str | None = None,
+        semantic_cache: SemanticLLMCache | None = None,
     ):
         self.model = model or settings.llm_model
-        effective_base_url = base_url or settings.openai_base_url or None
-        self.client = AsyncOpenAI(
-            api_key=api_key or settings.openai_api_key,
-            base_url=effective_base_url,
-        )
+        self.default_temperature = settings.llm_temperature
+        self.default_max_tokens = settings.llm_max_tokens
+        self.api_key = api_key or settings.openai_api_key
+        self.base_url = base_url or settings.openai_base_url or None
+        if semantic_cache is None and settings.llm_semantic_cache_enabled:
+            semantic_cache = SemanticLLMCache()
+        self.semantic_cache = semantic_cache
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return get_openai_client(self.api_key, self.base_url)
+
+    @staticmethod
+    def _build_messages(
+        prompt: str,
+        system_prompt: str | None = None,
+        cached_prefix: str | None = None,
+    ) -> list[dict[str, str]]:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        if cached_prefix:
+            messages.append({"role": "user", "content": cached_prefix})
+        messages.append({"role": "user", "content": prompt})
+        return messages
 
     async def generate(
         self,
@@ -24,20 +165,47 @@ class LLMClient:
         system_prompt: str | None = None,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        cached_prefix: str | None = None,
+        semantic_cache: bool = False,
     ) -> str:
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        messages = self._build_messages(prompt, system_prompt, cached_prefix)
+        temperature = self.default_temperature if temperature is None else temperature
+        max_tokens = max_tokens or self.default_max_tokens
+
+        cache_key = None
+        if settings.llm_cache_enabled and temperature == 0:
+            cache_key = _cache_key(
+                {"model": self.model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+            )
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+        semantic_text = None
+        semantic_embedding = None
+        # Near-duplicate prompts can need different answers (a diff for slightly different
+        # file content is a different diff), so callers opt in per call.
+        if cache_key and semantic_cache and self.semantic_cache:
+            semantic_text = "\n\n".join(m["content"] for m in messages)
+            cached, semantic_embedding = await self.semantic_cache.lookup(self.model, semantic_text)
+            if cached is not None:
+                _cache_set(cache_key, cached)
+                return cached
 
         response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
-            temperature=temperature or settings.llm_temperature,
-            max_tokens=max_tokens or settings.llm_max_tokens,
+            temperature=temperature,
+            max_tokens=max_tokens,
         )
 
-        return response.choices[0].message.content or ""
+        content = response.choices[0].message.content or ""
+        if cache_key and content:
+            _cache_set(cache_key, content)
+            if semantic_text and semantic_embedding:
+                await self.semantic_cache.store(self.model, semantic_text, semantic_embedding, content)
+
+        return content
 
     async def generate_structured(
         self,
@@ -46,35 +214,49 @@ class LLMClient:
         system_prompt: str | None = None,
         temperature: float | None = None,
     ) -> BaseModel:
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        messages = self._build_messages(prompt, system_prompt)
+        temperature = self.default_temperature if temperature is None else temperature
+
+        cache_key = None
+        if settings.llm_cache_enabled and temperature == 0:
+            cache_key = _cache_key(
+                {
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": temperature,
+                    "response_model": response_model.__qualname__,
+                }
+            )
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                return response_model.model_validate_json(cached)
 
         response = await self.client.beta.chat.completions.parse(
             model=self.model,
             messages=messages,
             response_format=response_model,
-            temperature=temperature or settings.llm_temperature,
+            temperature=temperature,
         )
 
-        return response.choices[0].message.parsed
+        parsed = response.choices[0].message.parsed
+        if cache_key and parsed is not None:
+            _cache_set(cache_key, parsed.model_dump_json())
+
+        return parsed
 
     async def stream(
         self,
         prompt: str,
         system_prompt: str | None = None,
         temperature: float | None = None,
+        cached_prefix: str | None = None,
     ):
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        messages = self._build_messages(prompt, system_prompt, cached_prefix)
 
         stream = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
-            temperature=temperature or settings.llm_temperature,
+            temperature=self.default_temperature if temperature is None else temperature,
             stream=True,
         )
 
@@ -83,4 +265,12 @@ class LLMClient:
                 yield chunk.choices[0].delta.content
 
 
-llm_client = LLMClient()
+@cache
+def _default_llm_client() -> LLMClient:
+    return LLMClient()
+
+
+def __getattr__(name: str) -> Any:
+    if name == "llm_client":
+        return _default_llm_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,21 +1,41 @@
+from operator import itemgetter
 from typing import Any
 
-from sqlalchemy import select, text
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import settings
 from src.db.models import CodeChunk
-from src.indexing.embedder import Embedder
+from src.indexing.embedder import Embedder, create_embedder
 
+_SEARCH_SQL = text("""
+    SELECT 
+        id, file_path, chunk_type, symbol_name, 
+        start_line, end_line, content, language,
+        1 - (embedding <=> :embedding) as similarity
+    FROM code_chunks
+    WHERE (CAST(:repo_id AS uuid) IS NULL OR repo_id = CAST(:repo_id AS uuid))
+      AND 1 - (embedding <=> :embedding) > :min_similarity
+    ORDER BY embedding <=> :embedding
+    LIMIT :limit
+""").bindparams(bindparam("embedding", type_=Vector(settings.embedding_dimensions)))
 
-def _format_vector(embedding: list[float]) -> str:
-    """Format embedding as pgvector literal."""
-    return "[" + ",".join(str(x) for x in embedding) + "]"
+_PGVECTOR_DEFAULT_EF_SEARCH = 40
+_SET_EF_SEARCH_SQL = text("SELECT set_config('hnsw.ef_search', :ef_search, true)")
+
+_CHUNK_FIELDS = ("file_path", "chunk_type", "symbol_name", "start_line", "end_line", "content", "language")
+_CHUNK_COLUMNS = [CodeChunk.id, *(getattr(CodeChunk, name) for name in _CHUNK_FIELDS)]
+_get_chunk_fields = itemgetter(*_CHUNK_FIELDS)
+
+
+def _row_to_dict(row: Any) -> dict[str, Any]:
+    return {"id": str(row["id"]), **dict(zip(_CHUNK_FIELDS, _get_chunk_fields(row), strict=True))}
 
 
 class VectorSearch:
     def __init__(self, embedder: Embedder | None = None):
-        self.embedder = embedder or Embedder()
+        self.embedder = embedder or create_embedder()
 
     async def search(
         self,
@@ -28,62 +48,21 @@ class VectorSearch:
         min_similarity = min_similarity or settings.min_similarity_threshold
 
         query_embedding = await self.embedder.embed_single(query)
-        embedding_str = _format_vector(query_embedding)
-
-        if repo_id:
-            sql = text(f"""
-                SELECT 
-                    id, file_path, chunk_type, symbol_name, 
-                    start_line, end_line, content, language,
-                    1 - (embedding <=> '{embedding_str}'::vector) as similarity
-                FROM code_chunks
-                WHERE repo_id = :repo_id
-                  AND 1 - (embedding <=> '{embedding_str}'::vector) > :min_similarity
-                ORDER BY similarity DESC
-                LIMIT :limit
-            """)
-            result = await db.execute(
-                sql,
-                {
-                    "repo_id": repo_id,
-                    "min_similarity": min_similarity,
-                    "limit": top_k,
-                },
-            )
-        else:
-            sql = text(f"""
-                SELECT 
-                    id, file_path, chunk_type, symbol_name, 
-                    start_line, end_line, content, language,
-                    1 - (embedding <=> '{embedding_str}'::vector) as similarity
-                FROM code_chunks
-                WHERE 1 - (embedding <=> '{embedding_str}'::vector) > :min_similarity
-                ORDER BY similarity DESC
-                LIMIT :limit
-            """)
-            result = await db.execute(
-                sql,
-                {
-                    "min_similarity": min_similarity,
-                    "limit": top_k,
-                },
-            )
-
-        rows = result.fetchall()
+        if settings.hnsw_ef_search != _PGVECTOR_DEFAULT_EF_SEARCH:
+            await db.execute(_SET_EF_SEARCH_SQL, {"ef_search": str(settings.hnsw_ef_search)})
+        result = await db.execute(
+            _SEARCH_SQL,
+            {
+                "embedding": query_embedding,
+                "repo_id": repo_id,
+                "min_similarity": min_similarity,
+                "limit": top_k,
+            },
+        )
 
         return [
-            {
-                "id": str(row.id),
-                "file_path": row.file_path,
-                "chunk_type": row.chunk_type,
-                "symbol_name": row.symbol_name,
-                "start_line": row.start_line,
-                "end_line": row.end_line,
-                "content": row.content,
-                "language": row.language,
-                "similarity": float(row.similarity),
-            }
-            for row in rows
+            {**_row_to_dict(row), "similarity": float(row["similarity"])}
+            for row in result.mappings().all()
         ]
 
     async def search_by_symbol(
@@ -92,27 +71,14 @@ class VectorSearch:
         symbol_name: str,
         repo_id: str | None = None,
     ) -> list[dict[str, Any]]:
-        query = select(CodeChunk).where(CodeChunk.symbol_name == symbol_name)
+        query = select(*_CHUNK_COLUMNS).where(CodeChunk.symbol_name == symbol_name)
 
         if repo_id:
             query = query.where(CodeChunk.repo_id == repo_id)
 
         result = await db.execute(query)
-        chunks = result.scalars().all()
 
-        return [
-            {
-                "id": str(chunk.id),
-                "file_path": chunk.file_path,
-                "chunk_type": chunk.chunk_type,
-                "symbol_name": chunk.symbol_name,
-                "start_line": chunk.start_line,
-                "end_line": chunk.end_line,
-                "content": chunk.content,
-                "language": chunk.language,
-            }
-            for chunk in chunks
-        ]
+        return [_row_to_dict(row) for row in result.mappings().all()]
 
     async def get_file_chunks(
         self,
@@ -120,7 +86,7 @@ class VectorSearch:
         file_path: str,
         repo_id: str | None = None,
     ) -> list[dict[str, Any]]:
-        query = select(CodeChunk).where(CodeChunk.file_path == file_path)
+        query = select(*_CHUNK_COLUMNS).where(CodeChunk.file_path == file_path)
 
         if repo_id:
             query = query.where(CodeChunk.repo_id == repo_id)
@@ -128,18 +94,5 @@ class VectorSearch:
         query = query.order_by(CodeChunk.start_line)
 
         result = await db.execute(query)
-        chunks = result.scalars().all()
 
-        return [
-            {
-                "id": str(chunk.id),
-                "file_path": chunk.file_path,
-                "chunk_type": chunk.chunk_type,
-                "symbol_name": chunk.symbol_name,
-                "start_line": chunk.start_line,
-                "end_line": chunk.end_line,
-                "content": chunk.content,
-                "language": chunk.language,
-            }
-            for chunk in chunks
-        ]
+        return [_row_to_dict(row) for row in result.mappings().all()]
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -5,11 +7,20 @@ from src.api.routes import health_router, runs_router
 from src.config import settings
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from src.agent.graph import build_graph
+
+    build_graph()
+    yield
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Agentic AI Code Reviewer",
         description="AI-powered code review and auto-refactor system",
         version="0.1.0",
+        lifespan=lifespan,
     )
     
     app.add_middleware(
@@ -23,12 +34,4 @@ def create_app() -> FastAPI:
     app.include_router(health_router)
     app.include_router(runs_router, prefix="/api")
     
-    @app.on_event("startup")
-    async def startup():
-        pass
-    
-    @app.on_event("shutdown")
-    async def shutdown():
-        pass
-    
     return app
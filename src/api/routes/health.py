@@ -1,7 +1,16 @@
+import time
+
 from fastapi import APIRouter
+from sqlalchemy import text
+
+from src.db.models import engine
 
 router = APIRouter(tags=["health"])
 
+_READY_TTL_NS = 500_000_000
+_SELECT_ONE = text("SELECT 1")
+_last_ready: tuple[int, dict] | None = None
+
 
 @router.get("/health")
 async def health_check():
@@ -10,12 +19,18 @@ async def health_check():
 
 @router.get("/ready")
 async def readiness_check():
-    from src.db.models import async_session
-    from sqlalchemy import text
-    
+    global _last_ready
+
+    now = time.monotonic_ns()
+    if _last_ready is not None and now - _last_ready[0] < _READY_TTL_NS:
+        return _last_ready[1]
+
     try:
-        async with async_session() as db:
-            await db.execute(text("SELECT 1"))
-        return {"status": "ready"}
+        async with engine.connect() as conn:
+            await conn.scalar(_SELECT_ONE)
+        result = {"status": "ready"}
     except Exception as e:
-        return {"status": "not ready", "error": str(e)}
+        result = {"status": "not ready", "error": str(e)}
+
+    _last_ready = (now, result)
+    return result
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 import uuid
 
 from src.agent.state import AgentState, Decision, RunStatus, TaskType
 from src.agent.graph import build_graph
+from src.agent.tools.diff_generator import DiffGenerationRequest, get_diff_generator
 
 
 router = APIRouter(prefix="/api/runs", tags=["runs"])
@@ -50,7 +52,9 @@ async def create_run(request: CreateRunRequest):
     )
     
     graph = build_graph()
-    final_state = graph.invoke(state)
+    final_state = await graph.ainvoke(state)
+    if isinstance(final_state, dict):
+        final_state = AgentState(**final_state)
     
     return RunResponse(
         id=final_state.run_id,
@@ -66,6 +70,23 @@ async def create_run(request: CreateRunRequest):
     )
 
 
+@router.post("/diff/stream")
+async def stream_diff(request: DiffGenerationRequest):
+    diff_generator = get_diff_generator()
+
+    async def events():
+        async for line in diff_generator.generate_diff_stream(
+            file_path=request.file_path,
+            current_content=request.current_content,
+            description=request.description,
+            context=request.context,
+        ):
+            yield f"data: {line}\n\n"
+        yield "event: done\ndata: \n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @router.get("/", response_model=list[RunListResponse])
 async def list_runs(limit: int = 20):
     from sqlalchemy import select
@@ -73,23 +94,31 @@ async def list_runs(limit: int = 20):
     
     async with async_session() as db:
         result = await db.execute(
-            select(AgentRun)
+            select(
+                AgentRun.id,
+                AgentRun.status,
+                AgentRun.task_type,
+                AgentRun.decision,
+                AgentRun.quality_score,
+                AgentRun.risk_score,
+                AgentRun.created_at,
+            )
             .order_by(AgentRun.created_at.desc())
             .limit(limit)
         )
-        runs = result.scalars().all()
+        rows = result.all()
     
     return [
         RunListResponse(
-            id=str(run.id),
-            status=run.status,
-            task_type=run.task_type,
-            decision=run.decision,
-            quality_score=run.quality_score,
-            risk_score=run.risk_score,
-            created_at=run.created_at.isoformat() if run.created_at else "",
+            id=str(row.id),
+            status=row.status,
+            task_type=row.task_type,
+            decision=row.decision,
+            quality_score=row.quality_score,
+            risk_score=row.risk_score,
+            created_at=row.created_at.isoformat() if row.created_at else "",
         )
-        for run in runs
+        for row in rows
     ]
 
 
@@ -100,17 +129,24 @@ async def get_run(run_id: str):
     
     async with async_session() as db:
         result = await db.execute(
-            select(AgentRun).where(AgentRun.id == uuid.UUID(run_id))
+            select(
+                AgentRun.id,
+                AgentRun.status,
+                AgentRun.task_type,
+                AgentRun.task_description,
+                AgentRun.decision,
+                AgentRun.quality_score,
+                AgentRun.risk_score,
+                Patch.diff_content,
+            )
+            .join(Patch, Patch.run_id == AgentRun.id, isouter=True)
+            .where(AgentRun.id == uuid.UUID(run_id))
+            .limit(1)
         )
-        run = result.scalar_one_or_none()
-        
-        if not run:
-            raise HTTPException(status_code=404, detail="Run not found")
-        
-        patch_result = await db.execute(
-            select(Patch).where(Patch.run_id == run.id)
-        )
-        patch = patch_result.scalar_one_or_none()
+        run = result.first()
+    
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
     
     return RunResponse(
         id=str(run.id),
@@ -120,7 +156,7 @@ async def get_run(run_id: str):
         decision=run.decision,
         quality_score=run.quality_score,
         risk_score=run.risk_score,
-        diff=patch.diff_content if patch else None,
+        diff=run.diff_content,
         errors=[],
     )
 
@@ -154,6 +190,6 @@ async def get_run_audit(run_id: str):
     
     async with async_session() as db:
         logger = AuditLogger(db)
-        trace = await logger.get_run_trace(run_id)
+        trace = [entry async for entry in logger.get_run_trace(run_id)]
     
     return {"trace": trace}
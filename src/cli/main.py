@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import Optional
 import asyncio
+from types import MappingProxyType
 
 import typer
 from rich.console import Console
@@ -15,6 +16,25 @@ from src.agent.graph import build_graph
 app = typer.Typer(name="kilo", help="Agentic AI Code Reviewer")
 console = Console()
 
+_STATUS_COLOR = MappingProxyType({
+    "pending": "yellow",
+    "running": "blue",
+    "completed": "green",
+    "failed": "red",
+})
+
+_DECISION_FMT = MappingProxyType({
+    "auto_approve": "[green]auto-approve[/green]",
+    "needs_review": "[yellow]needs-review[/yellow]",
+    "reject": "[red]reject[/red]",
+})
+
+_DECISION_COLOR = MappingProxyType({
+    Decision.AUTO_APPROVE: "green",
+    Decision.NEEDS_REVIEW: "yellow",
+    Decision.REJECT: "red",
+})
+
 
 @app.command()
 def review(
@@ -89,7 +109,7 @@ def index(
                     end_line=chunk.end_line,
                     content=chunk.content,
                     language=chunk.language,
-                    embedding=chunk.embedding,
+                    embedding=chunk.embedding.tolist(),
                 )
                 db.add(db_chunk)
             
@@ -203,20 +223,8 @@ def runs():
     table.add_column("Created")
     
     for run in runs_list:
-        status_color = {
-            "pending": "yellow",
-            "running": "blue",
-            "completed": "green",
-            "failed": "red",
-        }.get(run.status, "white")
-        
-        decision_str = run.decision or "-"
-        if run.decision == "auto_approve":
-            decision_str = "[green]auto-approve[/green]"
-        elif run.decision == "needs_review":
-            decision_str = "[yellow]needs-review[/yellow]"
-        elif run.decision == "reject":
-            decision_str = "[red]reject[/red]"
+        status_color = _STATUS_COLOR.get(run.status, "white")
+        decision_str = _DECISION_FMT.get(run.decision, run.decision or "-")
         
         table.add_row(
             str(run.id)[:8],
@@ -238,11 +246,7 @@ def _display_results(state: AgentState | dict, output: Optional[Path] = None):
     if isinstance(state, dict):
         state = AgentState(**state)
     
-    decision_color = {
-        Decision.AUTO_APPROVE: "green",
-        Decision.NEEDS_REVIEW: "yellow",
-        Decision.REJECT: "red",
-    }.get(state.decision, "white")
+    decision_color = _DECISION_COLOR.get(state.decision, "white")
     
     console.print(Panel(
         f"[bold]Decision:[/bold] [{decision_color}]{state.decision.value if state.decision else 'unknown'}[/{decision_color}]\n"
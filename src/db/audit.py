@@ -1,16 +1,87 @@
-import json
+import asyncio
+import contextlib
+import logging
+import math
 import uuid
-from datetime import datetime
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import lru_cache
 from typing import Any
 
+import orjson
+from sqlalchemy import Row, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import settings
 from src.db.models import AuditLog
 
+logger = logging.getLogger(__name__)
+
+_parse_run_id = lru_cache(maxsize=1024)(uuid.UUID)
+
+_CREATED_AT_ISO = func.to_char(AuditLog.created_at, 'YYYY-MM-DD"T"HH24:MI:SS.USTZH:TZM').label("created_at_iso")
+
+_COPY_COLUMNS = ("id", "run_id", "event_type", "event_data", "actor", "ip_address", "user_agent", "created_at")
+
+
+def _truncate(value: str, max_bytes: int = 500) -> str:
+    if len(value) <= max_bytes // 4:
+        return value
+    return value.encode()[:max_bytes].decode(errors="ignore")
+
+
+@dataclass(slots=True)
+class AuditEntry:
+    id: uuid.UUID
+    run_id: uuid.UUID | None
+    event_type: str
+    created_at: datetime
+
 
 class AuditLogger:
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession | None = None,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        batch_size: int | None = None,
+        flush_interval_ms: int | None = None,
+        queue_maxsize: int | None = None,
+    ):
         self.db = db
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.audit_log_buffer_size
+        self.flush_interval = (flush_interval_ms or settings.audit_log_buffer_time_ms) / 1000
+        self.dropped = 0
+        maxlen = queue_maxsize or settings.audit_log_queue_maxsize
+        self._buffers: tuple[deque[dict[str, Any]], deque[dict[str, Any]]] = (deque(maxlen=maxlen), deque(maxlen=maxlen))
+        self._active = 0
+        self._pending = asyncio.Event()
+        self._flusher_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self._batch: list[dict[str, Any]] | None = None
+
+    @staticmethod
+    def _build_row(
+        run_id: str,
+        event_type: str,
+        event_data: dict[str, Any],
+        actor: str = "system",
+        ip_address: str | None = None,
+        user_agent: str | None = None,
+    ) -> dict[str, Any]:
+        return {
+            "id": uuid.uuid4(),
+            "run_id": _parse_run_id(run_id) if run_id else None,
+            "event_type": event_type,
+            "event_data": orjson.Fragment(orjson.dumps(event_data, option=orjson.OPT_NON_STR_KEYS)),
+            "actor": actor,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": datetime.now(UTC),
+        }
 
     async def log(
         self,
@@ -20,45 +91,142 @@ class AuditLogger:
         actor: str = "system",
         ip_address: str | None = None,
         user_agent: str | None = None,
-    ) -> AuditLog:
-        entry = AuditLog(
-            id=uuid.uuid4(),
-            run_id=uuid.UUID(run_id) if run_id else None,
+    ) -> AuditEntry:
+        row = self._build_row(run_id, event_type, event_data, actor, ip_address, user_agent)
+
+        if self._batch is not None:
+            self._batch.append(row)
+        else:
+            await self._write([row])
+
+        return AuditEntry(
+            id=row["id"],
+            run_id=row["run_id"],
             event_type=event_type,
-            event_data=event_data,
-            actor=actor,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            created_at=datetime.utcnow(),
+            created_at=row["created_at"],
         )
 
-        self.db.add(entry)
-        await self.db.commit()
+    async def log_many(self, events: list[dict[str, Any]]) -> None:
+        rows = [self._build_row(**event) for event in events]
+        if rows:
+            await self._write(rows)
 
-        return entry
+    @asynccontextmanager
+    async def begin_batch(self) -> AsyncIterator["AuditLogger"]:
+        self._batch = []
+        try:
+            yield self
+        finally:
+            rows, self._batch = self._batch, None
+            if rows:
+                await self._write(rows)
 
-    async def log_run_started(
+    async def _write(self, rows: list[dict[str, Any]]) -> None:
+        if self.session_factory is None:
+            await self._insert_rows(self.db, rows)
+            return
+
+        buffer = self._buffers[self._active]
+        for row in rows:
+            if len(buffer) == buffer.maxlen:
+                self.dropped += 1
+            buffer.append(row)
+
+        if len(buffer) >= self.batch_size:
+            self._pending.set()
+        if self._flusher_task is None or self._flusher_task.done():
+            self._flusher_task = asyncio.create_task(self._flusher())
+
+    async def _flusher(self) -> None:
+        while self._buffers[0] or self._buffers[1]:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._pending.wait(), self.flush_interval)
+            self._pending.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # The failed batch is back in its buffer; it is retried on the next interval.
+                logger.exception("Failed to write audit log batch")
+
+    async def flush(self) -> None:
+        # One flush at a time: a second caller waits until rows popped by the first are
+        # committed, and never swaps the active buffer onto a deque still being drained.
+        async with self._flush_lock:
+            while self._buffers[0] or self._buffers[1]:
+                drain = self._buffers[self._active]
+                self._active ^= 1
+                while drain:
+                    rows = [drain.popleft() for _ in range(min(self.batch_size, len(drain)))]
+                    try:
+                        async with self.session_factory() as session:
+                            await self._insert_rows(session, rows)
+                            await session.commit()
+                    except BaseException:
+                        self._requeue(drain, rows)
+                        raise
+
+    def _requeue(self, buffer: deque[dict[str, Any]], rows: list[dict[str, Any]]) -> None:
+        overflow = len(buffer) + len(rows) - buffer.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        buffer.extendleft(reversed(rows))
+
+    @staticmethod
+    async def _insert_rows(session: AsyncSession, rows: list[dict[str, Any]]) -> None:
+        if len(rows) < settings.audit_log_copy_threshold:
+            await session.execute(insert(AuditLog), rows)
+            return
+
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            AuditLog.__tablename__,
+            records=[
+                (
+                    row["id"],
+                    row["run_id"],
+                    row["event_type"],
+                    orjson.dumps(row["event_data"]).decode(),
+                    row["actor"],
+                    row["ip_address"],
+                    row["user_agent"],
+                    row["created_at"],
+                )
+                for row in rows
+            ],
+            columns=_COPY_COLUMNS,
+        )
+
+    async def close(self) -> None:
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher_task
+            self._flusher_task = None
+        await self.flush()
+
+    def log_run_started(
         self,
         run_id: str,
         task_type: str,
         task_description: str,
-    ) -> None:
-        await self.log(
+    ) -> Awaitable[AuditEntry]:
+        return self.log(
             run_id=run_id,
             event_type="RUN_STARTED",
             event_data={
                 "task_type": task_type,
-                "task_description": task_description[:500],
+                "task_description": _truncate(task_description),
             },
         )
 
-    async def log_repo_ingested(
+    def log_repo_ingested(
         self,
         run_id: str,
         file_count: int,
         commit_sha: str | None,
-    ) -> None:
-        await self.log(
+    ) -> Awaitable[AuditEntry]:
+        return self.log(
             run_id=run_id,
             event_type="REPO_INGESTED",
             event_data={
@@ -67,61 +235,70 @@ class AuditLogger:
             },
         )
 
-    async def log_context_retrieved(
+    def log_context_retrieved(
         self,
         run_id: str,
         chunk_ids: list[str],
         similarities: list[float],
-    ) -> None:
-        await self.log(
+    ) -> Awaitable[AuditEntry]:
+        event_data: dict[str, Any] = {"chunk_count": len(chunk_ids), "avg_similarity": 0}
+
+        if similarities:
+            ordered = sorted(similarities)
+            count = len(ordered)
+            mid = count // 2
+            event_data["avg_similarity"] = math.fsum(ordered) / count
+            event_data["min_similarity"] = ordered[0]
+            event_data["max_similarity"] = ordered[-1]
+            event_data["p50_similarity"] = ordered[mid] if count % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+        return self.log(
             run_id=run_id,
             event_type="CONTEXT_RETRIEVED",
-            event_data={
-                "chunk_count": len(chunk_ids),
-                "avg_similarity": sum(similarities) / len(similarities) if similarities else 0,
-            },
+            event_data=event_data,
         )
 
-    async def log_plan_generated(
+    def log_plan_generated(
         self,
         run_id: str,
         plan_summary: str,
         confidence: float,
-    ) -> None:
-        await self.log(
+    ) -> Awaitable[AuditEntry]:
+        return self.log(
             run_id=run_id,
             event_type="PLAN_GENERATED",
             event_data={
-                "plan_summary": plan_summary[:500],
+                "plan_summary": _truncate(plan_summary),
                 "confidence": confidence,
             },
         )
 
-    async def log_patch_generated(
+    def log_patch_generated(
         self,
         run_id: str,
         files_affected: list[str],
         lines_added: int,
         lines_removed: int,
-    ) -> None:
-        await self.log(
+    ) -> Awaitable[AuditEntry]:
+        return self.log(
             run_id=run_id,
             event_type="PATCH_GENERATED",
             event_data={
                 "files_affected": files_affected,
+                "file_count": len(files_affected),
                 "lines_added": lines_added,
                 "lines_removed": lines_removed,
             },
         )
 
-    async def log_check_executed(
+    def log_check_executed(
         self,
         run_id: str,
         check_name: str,
         passed: bool,
         error_count: int,
-    ) -> None:
-        await self.log(
+    ) -> Awaitable[AuditEntry]:
+        return self.log(
             run_id=run_id,
             event_type="CHECK_EXECUTED",
             event_data={
@@ -131,14 +308,14 @@ class AuditLogger:
             },
         )
 
-    async def log_decision_made(
+    def log_decision_made(
         self,
         run_id: str,
         decision: str,
         quality_score: float,
         risk_score: float,
-    ) -> None:
-        await self.log(
+    ) -> Awaitable[AuditEntry]:
+        return self.log(
             run_id=run_id,
             event_type="DECISION_MADE",
             event_data={
@@ -148,24 +325,35 @@ class AuditLogger:
             },
         )
 
-    async def get_run_trace(self, run_id: str) -> list[dict[str, Any]]:
-        from sqlalchemy import select
-
-        result = await self.db.execute(
-            select(AuditLog)
-            .where(AuditLog.run_id == uuid.UUID(run_id))
+    async def get_run_trace(self, run_id: str | uuid.UUID) -> AsyncIterator[dict[str, Any]]:
+        query = (
+            select(
+                AuditLog.id,
+                AuditLog.event_type,
+                AuditLog.event_data,
+                AuditLog.actor,
+                _CREATED_AT_ISO,
+            )
+            .where(AuditLog.run_id == (run_id if isinstance(run_id, uuid.UUID) else _parse_run_id(run_id)))
             .order_by(AuditLog.created_at)
         )
 
-        entries = result.scalars().all()
-
-        return [
-            {
-                "id": str(entry.id),
-                "event_type": entry.event_type,
-                "event_data": entry.event_data,
-                "actor": entry.actor,
-                "created_at": entry.created_at.isoformat(),
-            }
-            for entry in entries
-        ]
+        if self.db is not None:
+            async for row in await self.db.stream(query):
+                yield self._trace_entry(row)
+            return
+
+        await self.flush()
+        async with self.session_factory() as session:
+            async for row in await session.stream(query):
+                yield self._trace_entry(row)
+
+    @staticmethod
+    def _trace_entry(row: Row) -> dict[str, Any]:
+        return {
+            "id": str(row.id),
+            "event_type": row.event_type,
+            "event_data": row.event_data,
+            "actor": row.actor,
+            "created_at": row.created_at_iso,
+        }
@@ -33,9 +33,9 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations_online() -> None:
-    from src.db.models import sync_engine
+    from src.db.models import get_sync_engine
 
-    with sync_engine.connect() as connection:
+    with get_sync_engine().connect() as connection:
         context.configure(connection=connection, target_metadata=target_metadata)
 
         with context.begin_transaction():
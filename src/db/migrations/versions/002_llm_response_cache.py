@@ -0,0 +1,38 @@
+"""LLM response cache
+
+Revision ID: 002_llm_response_cache
+Revises: 001_initial
+Create Date: 2024-02-01
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = '002_llm_response_cache'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_response_cache',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('model', sa.String(100), nullable=False),
+        sa.Column('prompt_hash', sa.String(64), nullable=False),
+        sa.Column('embedding', sa.Text, nullable=False),
+        sa.Column('response', sa.Text, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.execute("ALTER TABLE llm_response_cache ALTER COLUMN embedding TYPE vector(1536) USING embedding::vector")
+
+    op.create_index('idx_llm_response_cache_model', 'llm_response_cache', ['model'])
+
+
+def downgrade() -> None:
+    op.drop_table('llm_response_cache')
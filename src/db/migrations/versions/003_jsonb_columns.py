@@ -0,0 +1,53 @@
+"""Store JSON columns as JSONB
+
+Revision ID: 003_jsonb_columns
+Revises: 002_llm_response_cache
+Create Date: 2024-02-15
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = '003_jsonb_columns'
+down_revision: Union[str, None] = '002_llm_response_cache'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_COLUMNS = [
+    ('code_chunks', 'metadata'),
+    ('agent_runs', 'metadata'),
+    ('check_results', 'details'),
+    ('tool_executions', 'input'),
+    ('tool_executions', 'output'),
+    ('audit_log', 'event_data'),
+]
+
+
+def upgrade() -> None:
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB,
+            postgresql_using=f'"{column}"::jsonb',
+        )
+
+    op.execute(
+        "CREATE INDEX idx_audit_log_event_data_gin ON audit_log USING gin (event_data jsonb_path_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_audit_log_event_data_gin', table_name='audit_log')
+
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON,
+            postgresql_using=f'"{column}"::json',
+        )
@@ -0,0 +1,129 @@
+"""Partition audit_log by month
+
+Revision ID: 004_partition_audit_log
+Revises: 003_jsonb_columns
+Create Date: 2024-03-01
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+revision: str = '004_partition_audit_log'
+down_revision: Union[str, None] = '003_jsonb_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AUDIT_LOG_INDEXES = [
+    'idx_audit_log_run_id',
+    'idx_audit_log_event_type',
+    'idx_audit_log_created_at',
+    'idx_audit_log_event_data_gin',
+]
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+    for index in AUDIT_LOG_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute("""
+        CREATE TABLE audit_log (
+            id uuid NOT NULL,
+            run_id uuid REFERENCES agent_runs (id),
+            event_type varchar(100) NOT NULL,
+            event_data jsonb NOT NULL,
+            actor varchar(100) DEFAULT 'system',
+            ip_address varchar(45),
+            user_agent text,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION create_audit_log_partition(month date) RETURNS void AS $$
+        DECLARE
+            start_date date := date_trunc('month', month);
+            end_date date := start_date + interval '1 month';
+            partition_name text := 'audit_log_y' || to_char(start_date, 'YYYY') || 'm' || to_char(start_date, 'MM');
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+                partition_name, start_date, end_date
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        SELECT create_audit_log_partition((date_trunc('month', now()) + n * interval '1 month')::date)
+        FROM generate_series(0, 2) AS n
+    """)
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+                PERFORM cron.schedule(
+                    'audit_log_partitions',
+                    '0 0 1 * *',
+                    $cron$SELECT create_audit_log_partition((date_trunc('month', now()) + interval '2 months')::date)$cron$
+                );
+            END IF;
+        END
+        $$
+    """)
+
+    op.execute("CREATE INDEX idx_audit_log_run_id ON audit_log (run_id)")
+    op.execute("CREATE INDEX idx_audit_log_event_type ON audit_log (event_type)")
+    op.execute("CREATE INDEX idx_audit_log_created_at ON audit_log USING brin (created_at) WITH (pages_per_range = 32)")
+    op.execute("CREATE INDEX idx_audit_log_event_data_gin ON audit_log USING gin (event_data jsonb_path_ops)")
+
+    op.execute("""
+        INSERT INTO audit_log (id, run_id, event_type, event_data, actor, ip_address, user_agent, created_at)
+        SELECT id, run_id, event_type, event_data, actor, ip_address, user_agent, COALESCE(created_at, now())
+        FROM audit_log_legacy
+    """)
+    op.execute("DROP TABLE audit_log_legacy")
+
+
+def downgrade() -> None:
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+                PERFORM cron.unschedule('audit_log_partitions');
+            END IF;
+        END
+        $$
+    """)
+
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+    for index in AUDIT_LOG_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute("""
+        CREATE TABLE audit_log (
+            id uuid PRIMARY KEY,
+            run_id uuid REFERENCES agent_runs (id),
+            event_type varchar(100) NOT NULL,
+            event_data jsonb NOT NULL,
+            actor varchar(100),
+            ip_address varchar(45),
+            user_agent text,
+            created_at timestamptz DEFAULT now()
+        )
+    """)
+    op.execute("""
+        INSERT INTO audit_log (id, run_id, event_type, event_data, actor, ip_address, user_agent, created_at)
+        SELECT id, run_id, event_type, event_data, actor, ip_address, user_agent, created_at
+        FROM audit_log_partitioned
+    """)
+    op.execute("DROP TABLE audit_log_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS create_audit_log_partition(date)")
+
+    op.create_index('idx_audit_log_run_id', 'audit_log', ['run_id'])
+    op.create_index('idx_audit_log_event_type', 'audit_log', ['event_type'])
+    op.create_index('idx_audit_log_created_at', 'audit_log', ['created_at'])
+    op.execute("CREATE INDEX idx_audit_log_event_data_gin ON audit_log USING gin (event_data jsonb_path_ops)")
@@ -0,0 +1,29 @@
+"""HNSW index on code chunk embeddings
+
+Revision ID: 005_code_chunks_hnsw
+Revises: 004_partition_audit_log
+Create Date: 2024-03-15
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+revision: str = '005_code_chunks_hnsw'
+down_revision: Union[str, None] = '004_partition_audit_log'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_code_chunks_embedding_hnsw ON code_chunks "
+            "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_code_chunks_embedding_hnsw")
@@ -0,0 +1,26 @@
+"""Composite (run_id, created_at) index on audit_log
+
+Revision ID: 006_audit_log_run_created_index
+Revises: 005_code_chunks_hnsw
+Create Date: 2024-03-20
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+revision: str = '006_audit_log_run_created_index'
+down_revision: Union[str, None] = '005_code_chunks_hnsw'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_audit_log_run_id_created_at', 'audit_log', ['run_id', 'created_at'])
+    op.drop_index('idx_audit_log_run_id', table_name='audit_log')
+
+
+def downgrade() -> None:
+    op.create_index('idx_audit_log_run_id', 'audit_log', ['run_id'])
+    op.drop_index('idx_audit_log_run_id_created_at', table_name='audit_log')
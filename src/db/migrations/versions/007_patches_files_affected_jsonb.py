@@ -0,0 +1,38 @@
+"""Store patches.files_affected as lz4-compressed JSONB
+
+Revision ID: 007_patches_files_affected_jsonb
+Revises: 006_audit_log_run_created_index
+Create Date: 2024-04-01
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = '007_patches_files_affected_jsonb'
+down_revision: Union[str, None] = '006_audit_log_run_created_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'patches',
+        'files_affected',
+        type_=postgresql.JSONB,
+        postgresql_using='to_jsonb(files_affected)',
+    )
+    op.execute("ALTER TABLE patches ALTER COLUMN files_affected SET COMPRESSION lz4")
+
+
+def downgrade() -> None:
+    op.add_column('patches', sa.Column('files_affected_array', postgresql.ARRAY(sa.Text)))
+    op.execute(
+        "UPDATE patches SET files_affected_array = "
+        "ARRAY(SELECT jsonb_array_elements_text(files_affected))"
+    )
+    op.drop_column('patches', 'files_affected')
+    op.alter_column('patches', 'files_affected_array', new_column_name='files_affected', nullable=False)
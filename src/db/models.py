@@ -1,11 +1,12 @@
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime
+from functools import cache
 from typing import Any
 
+import orjson
 from pgvector.sqlalchemy import Vector
 from sqlalchemy import (
-    ARRAY,
-    JSON,
     Boolean,
     DateTime,
     Float,
@@ -14,10 +15,13 @@ from sqlalchemy import (
     String,
     Text,
     create_engine,
+    func,
 )
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.pool import NullPool
 
 from src.config import settings
 
@@ -26,10 +30,41 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(settings.database_url, pool_size=settings.database_pool_size, max_overflow=settings.database_max_overflow)
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+def _json_serializer(value: Any) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _pool_options() -> dict[str, Any]:
+    if settings.database_pool_mode == "pgbouncer":
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+                "server_settings": {"jit": "off"},
+            },
+        }
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_pre_ping": True,
+    }
+
+
+engine = create_async_engine(
+    settings.database_url,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+    **_pool_options(),
+)
+async_session = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
 
-sync_engine = create_engine(settings.database_sync_url)
+@cache
+def get_sync_engine() -> Engine:
+    return create_engine(settings.database_sync_url, pool_pre_ping=True, pool_size=2)
 
 
 class Repository(Base):
@@ -40,7 +75,7 @@ class Repository(Base):
     remote_url: Mapped[str | None] = mapped_column(String(500))
     default_branch: Mapped[str] = mapped_column(String(100), default="main")
     indexed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class CodeChunk(Base):
@@ -56,8 +91,19 @@ class CodeChunk(Base):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     language: Mapped[str | None] = mapped_column(String(50))
     embedding: Mapped[list[float] | None] = mapped_column(Vector(settings.embedding_dimensions))
-    metadata_: Mapped[dict[str, Any]] = mapped_column("metadata", JSON, default=dict)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    metadata_: Mapped[dict[str, Any]] = mapped_column("metadata", JSONB, default=dict)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class LLMResponseCache(Base):
+    __tablename__ = "llm_response_cache"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    prompt_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    embedding: Mapped[list[float]] = mapped_column(Vector(settings.embedding_dimensions), nullable=False)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class AgentRun(Base):
@@ -73,8 +119,8 @@ class AgentRun(Base):
     risk_score: Mapped[float | None] = mapped_column(Float)
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
-    metadata_: Mapped[dict[str, Any]] = mapped_column("metadata", JSON, default=dict)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    metadata_: Mapped[dict[str, Any]] = mapped_column("metadata", JSONB, default=dict)
 
 
 class Patch(Base):
@@ -83,12 +129,12 @@ class Patch(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     run_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("agent_runs.id"), nullable=False)
     diff_content: Mapped[str] = mapped_column(Text, nullable=False)
-    files_affected: Mapped[list[str]] = mapped_column(ARRAY(Text), nullable=False)
+    files_affected: Mapped[list[str]] = mapped_column(JSONB, nullable=False)
     lines_added: Mapped[int | None] = mapped_column(Integer)
     lines_removed: Mapped[int | None] = mapped_column(Integer)
     applied_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     sandbox_id: Mapped[str | None] = mapped_column(String(100))
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class CheckResult(Base):
@@ -101,9 +147,9 @@ class CheckResult(Base):
     output: Mapped[str | None] = mapped_column(Text)
     error_count: Mapped[int] = mapped_column(Integer, default=0)
     warning_count: Mapped[int] = mapped_column(Integer, default=0)
-    details: Mapped[list[dict[str, Any]]] = mapped_column(JSON, default=list)
+    details: Mapped[list[dict[str, Any]]] = mapped_column(JSONB, default=list)
     duration_ms: Mapped[int | None] = mapped_column(Integer)
-    executed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    executed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class ToolExecution(Base):
@@ -113,12 +159,12 @@ class ToolExecution(Base):
     run_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("agent_runs.id"), nullable=False)
     node_name: Mapped[str] = mapped_column(String(100), nullable=False)
     tool_name: Mapped[str] = mapped_column(String(100), nullable=False)
-    input_: Mapped[dict[str, Any] | None] = mapped_column("input", JSON)
-    output: Mapped[dict[str, Any] | None] = mapped_column(JSON)
+    input_: Mapped[dict[str, Any] | None] = mapped_column("input", JSONB)
+    output: Mapped[dict[str, Any] | None] = mapped_column(JSONB)
     success: Mapped[bool | None] = mapped_column(Boolean)
     error_message: Mapped[str | None] = mapped_column(Text)
     duration_ms: Mapped[int | None] = mapped_column(Integer)
-    executed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    executed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class AuditLog(Base):
@@ -127,13 +173,13 @@ class AuditLog(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     run_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("agent_runs.id"))
     event_type: Mapped[str] = mapped_column(String(100), nullable=False)
-    event_data: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    event_data: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
     actor: Mapped[str] = mapped_column(String(100), default="system")
     ip_address: Mapped[str | None] = mapped_column(String(45))
     user_agent: Mapped[str | None] = mapped_column(Text)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
-async def get_db() -> AsyncSession:
-    async with async_session() as session:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with async_session() as session, session.begin():
         yield session
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import unidiff
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedDiff:
+    patch_set: unidiff.PatchSet
+    files: tuple[str, ...]
+    lines_added: int
+    lines_removed: int
+    added_text: str
+
+
+@lru_cache(maxsize=16)
+def parse_diff(diff_content: str) -> ParsedDiff:
+    patch_set = unidiff.PatchSet(diff_content)
+
+    files: list[str] = []
+    added_lines: list[str] = []
+    lines_removed = 0
+
+    for patched_file in patch_set:
+        file_path = patched_file.path
+        if file_path.startswith("a/"):
+            file_path = file_path[2:]
+        files.append(file_path)
+
+        for hunk in patched_file:
+            for line in hunk:
+                if line.is_added:
+                    added_lines.append(line.value)
+                elif line.is_removed:
+                    lines_removed += 1
+
+    return ParsedDiff(
+        patch_set=patch_set,
+        files=tuple(files),
+        lines_added=len(added_lines),
+        lines_removed=lines_removed,
+        added_text="".join(added_lines),
+    )
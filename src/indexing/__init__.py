@@ -1,6 +1,22 @@
-from src.indexing.chunker import ChunkMetadata, CodeChunker, DocChunker
-from src.indexing.embedder import Embedder, EmbeddedChunk, RepoIngester, ingest_repository
-from src.indexing.filters import FileFilter, GitIgnoreFilter, IgnoreFilter, filter_files
+from importlib import import_module
+from typing import Any
+
+_EXPORT_MODULES = {
+    "ChunkMetadata": "src.indexing.chunker",
+    "CodeChunker": "src.indexing.chunker",
+    "DocChunker": "src.indexing.chunker",
+    "Embedder": "src.indexing.embedder",
+    "EmbeddedChunk": "src.indexing.embedder",
+    "LocalOnnxEmbedder": "src.indexing.embedder",
+    "RepoIngester": "src.indexing.embedder",
+    "create_embedder": "src.indexing.embedder",
+    "ingest_repository": "src.indexing.embedder",
+    "FileFilter": "src.indexing.filters",
+    "GitIgnoreFilter": "src.indexing.filters",
+    "IgnoreFilter": "src.indexing.filters",
+    "filter_files": "src.indexing.filters",
+    "filter_files_with_size": "src.indexing.filters",
+}
 
 __all__ = [
     "ChunkMetadata",
@@ -8,10 +24,21 @@ __all__ = [
     "DocChunker",
     "Embedder",
     "EmbeddedChunk",
+    "LocalOnnxEmbedder",
     "RepoIngester",
+    "create_embedder",
     "ingest_repository",
     "FileFilter",
     "GitIgnoreFilter",
     "IgnoreFilter",
     "filter_files",
+    "filter_files_with_size",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORT_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORT_MODULES[name]), name)
+    globals()[name] = value
+    return value
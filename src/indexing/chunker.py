@@ -1,5 +1,15 @@
 import ast
+import bisect
+import contextlib
+import hashlib
+import inspect
+import itertools
+import os
+import pickle
 import re
+import sys
+import tempfile
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
@@ -8,6 +18,18 @@ import tiktoken
 
 from src.config import settings
 
+_BRANCH_NODES = frozenset({ast.If, ast.While, ast.For, ast.AsyncFor, ast.ExceptHandler})
+
+
+def _docstring(
+    node: ast.Module | ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef,
+) -> str | None:
+    first = node.body[0] if node.body else None
+    if not (isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant)):
+        return None
+    value = first.value.value
+    return inspect.cleandoc(value) if isinstance(value, str) else None
+
 
 @dataclass
 class ChunkMetadata:
@@ -35,9 +57,46 @@ class CodeChunker:
         ".tsx": "tsx",
     }
 
-    def __init__(self, max_chunk_tokens: int = 500):
+    def __init__(self, max_chunk_tokens: int = 500, cache_dir: Path | None = None):
         self.max_chunk_tokens = max_chunk_tokens
         self.encoding = tiktoken.get_encoding("cl100k_base")
+        if cache_dir is None and settings.chunk_cache_dir:
+            cache_dir = Path(settings.chunk_cache_dir).expanduser()
+        if cache_dir is not None:
+            cache_dir = cache_dir / (
+                f"py{sys.version_info.major}{sys.version_info.minor}"
+                f"-tiktoken{tiktoken.__version__}-{self.encoding.name}"
+            )
+        self.cache_dir = cache_dir
+
+    def _cached_parse(self, content: str, parse: bool) -> tuple[ast.Module | None, list[int]]:
+        cache_path = None
+        if self.cache_dir is not None:
+            key = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+            cache_path = self.cache_dir / key[:2] / f"{key}{'.py' if parse else ''}.pickle"
+            try:
+                with cache_path.open("rb") as f:
+                    return pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+
+        tree = None
+        if parse:
+            with contextlib.suppress(SyntaxError):
+                tree = ast.parse(content)
+        tokens = self.encoding.encode(content)
+
+        if cache_path is not None:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent)
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump((tree, tokens), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass
+
+        return tree, tokens
 
     def chunk_file(self, file_path: Path, content: str) -> list[ChunkMetadata]:
         extension = file_path.suffix.lower()
@@ -51,52 +110,69 @@ class CodeChunker:
     def _chunk_python(self, file_path: Path, content: str, language: str) -> list[ChunkMetadata]:
         chunks: list[ChunkMetadata] = []
 
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
-            return self._chunk_generic(file_path, content, language)
+        tree, tokens = self._cached_parse(content, parse=True)
+        if tree is None:
+            return self._chunk_generic(file_path, content, language, tokens)
 
-        lines = content.splitlines()
+        line_offsets = [0, *(match.end() for match in re.finditer("\n", content))]
+        if line_offsets[-1] != len(content):
+            line_offsets.append(len(content) + 1)
+        line_count = len(line_offsets) - 1
+
+        encode_ordinary = self.encoding.encode_ordinary
+        prefix = list(
+            itertools.accumulate(
+                (len(encode_ordinary(content[start : end - 1])) + 1 for start, end in itertools.pairwise(line_offsets)),
+                initial=0,
+            )
+        )
 
-        module_docstring = ast.get_docstring(tree)
+        module_docstring = _docstring(tree)
         if module_docstring:
+            header_end = min(10, line_count)
             chunks.append(
                 ChunkMetadata(
                     file_path=str(file_path),
                     chunk_type="module",
                     symbol_name=None,
                     start_line=1,
-                    end_line=min(10, len(lines)),
-                    content="\n".join(lines[: min(10, len(lines))]),
+                    end_line=header_end,
+                    content=content[: line_offsets[header_end] - 1],
                     language=language,
                     docstring=module_docstring,
                 )
             )
 
-        for node in ast.walk(tree):
+        for node in tree.body:
             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                chunk = self._extract_function(file_path, node, lines, language)
+                chunk = self._extract_function(file_path, node, content, line_offsets, prefix, language)
                 if chunk:
                     chunks.append(chunk)
             elif isinstance(node, ast.ClassDef):
-                class_chunks = self._extract_class(file_path, node, lines, language)
+                class_chunks = self._extract_class(file_path, node, content, line_offsets, prefix, language)
                 chunks.extend(class_chunks)
 
-        return chunks if chunks else self._chunk_generic(file_path, content, language)
+        return chunks if chunks else self._chunk_generic(file_path, content, language, tokens)
 
     def _extract_function(
-        self, file_path: Path, node: ast.FunctionDef | ast.AsyncFunctionDef, lines: list[str], language: str
+        self,
+        file_path: Path,
+        node: ast.FunctionDef | ast.AsyncFunctionDef,
+        source: str,
+        line_offsets: list[int],
+        prefix: list[int],
+        language: str,
     ) -> ChunkMetadata | None:
         start_line = node.lineno
         end_line = node.end_lineno or start_line
-        content = "\n".join(lines[start_line - 1 : end_line])
+        content = source[line_offsets[start_line - 1] : line_offsets[end_line] - 1]
 
-        token_count = len(self.encoding.encode(content))
+        token_count = prefix[end_line] - prefix[start_line - 1]
         if token_count > self.max_chunk_tokens:
             content = self._truncate_content(content, self.max_chunk_tokens)
             end_line = start_line + content.count("\n")
 
-        dependencies = self._extract_dependencies(node)
+        dependencies, complexity = self._analyze_function(node)
 
         return ChunkMetadata(
             file_path=str(file_path),
@@ -106,22 +182,27 @@ class CodeChunker:
             end_line=end_line,
             content=content,
             language=language,
-            docstring=ast.get_docstring(node),
+            docstring=_docstring(node),
             dependencies=dependencies,
-            complexity_score=self._calculate_complexity(node),
+            complexity_score=complexity,
         )
 
     def _extract_class(
-        self, file_path: Path, node: ast.ClassDef, lines: list[str], language: str
+        self,
+        file_path: Path,
+        node: ast.ClassDef,
+        source: str,
+        line_offsets: list[int],
+        prefix: list[int],
+        language: str,
     ) -> list[ChunkMetadata]:
         chunks: list[ChunkMetadata] = []
 
         class_start = node.lineno
         class_end = node.end_lineno or class_start
-        class_content = "\n".join(lines[class_start - 1 : class_end])
-        class_docstring = ast.get_docstring(node)
+        class_docstring = _docstring(node)
 
-        class_token_count = len(self.encoding.encode(class_content))
+        class_token_count = prefix[class_end] - prefix[class_start - 1]
 
         if class_token_count <= self.max_chunk_tokens:
             chunks.append(
@@ -131,7 +212,7 @@ class CodeChunker:
                     symbol_name=node.name,
                     start_line=class_start,
                     end_line=class_end,
-                    content=class_content,
+                    content=source[line_offsets[class_start - 1] : line_offsets[class_end] - 1],
                     language=language,
                     docstring=class_docstring,
                 )
@@ -144,7 +225,7 @@ class CodeChunker:
                     break
 
             if header_end > class_start:
-                header_content = "\n".join(lines[class_start - 1 : header_end])
+                header_content = source[line_offsets[class_start - 1] : line_offsets[header_end] - 1]
                 chunks.append(
                     ChunkMetadata(
                         file_path=str(file_path),
@@ -160,42 +241,50 @@ class CodeChunker:
 
             for child in node.body:
                 if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    method_chunk = self._extract_function(file_path, child, lines, language)
+                    method_chunk = self._extract_function(file_path, child, source, line_offsets, prefix, language)
                     if method_chunk:
                         chunks.append(method_chunk)
 
         return chunks
 
-    def _extract_dependencies(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> list[str]:
-        dependencies: set[str] = set()
-
-        for child in ast.walk(node):
-            if isinstance(child, ast.Name):
-                dependencies.add(child.id)
-            elif isinstance(child, ast.Attribute):
-                if isinstance(child.value, ast.Name):
-                    dependencies.add(f"{child.value.id}.{child.attr}")
-
-        return list(dependencies)
-
-    def _calculate_complexity(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> int:
+    def _analyze_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> tuple[list[str], int]:
+        dependencies: dict[str, None] = {}
         complexity = 1
 
-        for child in ast.walk(node):
-            if isinstance(child, (ast.If, ast.While, ast.For, ast.AsyncFor)):
-                complexity += 1
-            elif isinstance(child, ast.ExceptHandler):
-                complexity += 1
-            elif isinstance(child, (ast.And, ast.Or)):
+        # Breadth-first like ast.walk, but dispatching on exact node types and never queuing
+        # the Load/Store/Del context singletons, which make up a large share of all nodes.
+        todo: deque[ast.AST] = deque([node])
+        while todo:
+            child = todo.popleft()
+            node_type = type(child)
+            if node_type is ast.Name:
+                dependencies[child.id] = None
+                continue
+            if node_type is ast.Attribute:
+                if type(child.value) is ast.Name:
+                    dependencies[f"{child.value.id}.{child.attr}"] = None
+            elif node_type in _BRANCH_NODES:
                 complexity += 1
+            elif node_type is ast.BoolOp:
+                complexity += len(child.values) - 1
+
+            for name in child._fields:
+                value = getattr(child, name, None)
+                if isinstance(value, list):
+                    todo.extend(item for item in value if isinstance(item, ast.AST))
+                elif isinstance(value, ast.AST) and name != "ctx":
+                    todo.append(value)
 
-        return complexity
+        return list(dependencies), complexity
 
-    def _chunk_generic(self, file_path: Path, content: str, language: str) -> list[ChunkMetadata]:
+    def _chunk_generic(
+        self, file_path: Path, content: str, language: str, tokens: list[int] | None = None
+    ) -> list[ChunkMetadata]:
         chunks: list[ChunkMetadata] = []
         lines = content.splitlines()
 
-        tokens = self.encoding.encode(content)
+        if tokens is None:
+            _, tokens = self._cached_parse(content, parse=False)
         total_tokens = len(tokens)
 
         if total_tokens <= self.max_chunk_tokens:
@@ -211,6 +300,9 @@ class CodeChunker:
                 )
             ]
 
+        token_ends = list(itertools.accumulate(map(len, self.encoding.decode_tokens_bytes(tokens))))
+        line_ends = list(itertools.accumulate(len(line.encode()) + 1 for line in lines))
+
         current_start = 0
         chunk_index = 0
 
@@ -220,8 +312,8 @@ class CodeChunker:
             chunk_tokens = tokens[current_start:current_end]
             chunk_content = self.encoding.decode(chunk_tokens)
 
-            start_line = self._find_line_number(tokens, current_start, lines)
-            end_line = self._find_line_number(tokens, current_end - 1, lines)
+            start_line = self._find_line_number(token_ends, current_start, line_ends)
+            end_line = self._find_line_number(token_ends, current_end - 1, line_ends)
 
             chunks.append(
                 ChunkMetadata(
@@ -235,25 +327,15 @@ class CodeChunker:
                 )
             )
 
+            if current_end == total_tokens:
+                break
             current_start = current_end - self.OVERLAP_TOKENS
             chunk_index += 1
 
         return chunks
 
-    def _find_line_number(self, tokens: list[int], token_index: int, lines: list[str]) -> int:
-        char_count = 0
-        for i, token in enumerate(tokens[: token_index + 1]):
-            char_count += len(self.encoding.decode([token]))
-
-        line_num = 1
-        current_chars = 0
-        for line in lines:
-            current_chars += len(line) + 1
-            if current_chars >= char_count:
-                return line_num
-            line_num += 1
-
-        return line_num
+    def _find_line_number(self, token_ends: list[int], token_index: int, line_ends: list[int]) -> int:
+        return bisect.bisect_left(line_ends, token_ends[token_index]) + 1
 
     def _truncate_content(self, content: str, max_tokens: int) -> str:
         tokens = self.encoding.encode(content)
@@ -295,10 +377,12 @@ class DocChunker:
         if current_section_start < len(lines):
             sections.append((current_section_title, current_section_start, len(lines) - 1))
 
-        for title, start, end in sections:
-            section_content = "\n".join(lines[start : end + 1])
-            token_count = len(self.encoding.encode(section_content))
+        section_contents = ["\n".join(lines[start : end + 1]) for _, start, end in sections]
+        token_counts = map(len, self.encoding.encode_batch(section_contents))
 
+        for (title, start, end), section_content, token_count in zip(
+            sections, section_contents, token_counts, strict=True
+        ):
             if token_count > self.max_chunk_tokens:
                 sub_chunks = self._split_large_section(file_path, section_content, start, title)
                 chunks.extend(sub_chunks)
@@ -323,39 +407,47 @@ class DocChunker:
         chunks: list[ChunkMetadata] = []
         paragraphs = re.split(r"\n\s*\n", content)
 
-        current_content = ""
+        pieces = [para + "\n\n" for para in paragraphs]
+        piece_counts = map(len, self.encoding.encode_ordinary_batch(pieces))
+
+        current_parts: list[str] = []
+        current_tokens = 0
+        current_newlines = 0
         current_start = start_line
         chunk_index = 0
 
-        for para in paragraphs:
-            para_with_newline = para + "\n\n"
-            if len(self.encoding.encode(current_content + para_with_newline)) > self.max_chunk_tokens:
-                if current_content:
+        for para_with_newline, para_tokens in zip(pieces, piece_counts, strict=True):
+            if current_tokens + para_tokens > self.max_chunk_tokens:
+                if current_parts:
                     chunks.append(
                         ChunkMetadata(
                             file_path=str(file_path),
                             chunk_type="doc",
                             symbol_name=f"{title} (part {chunk_index + 1})",
                             start_line=current_start + 1,
-                            end_line=current_start + current_content.count("\n"),
-                            content=current_content.strip(),
+                            end_line=current_start + current_newlines,
+                            content="".join(current_parts).strip(),
                             language="markdown",
                         )
                     )
                     chunk_index += 1
-                current_content = para_with_newline
+                current_parts = [para_with_newline]
+                current_tokens = para_tokens
+                current_newlines = para_with_newline.count("\n")
             else:
-                current_content += para_with_newline
+                current_parts.append(para_with_newline)
+                current_tokens += para_tokens
+                current_newlines += para_with_newline.count("\n")
 
-        if current_content:
+        if current_parts:
             chunks.append(
                 ChunkMetadata(
                     file_path=str(file_path),
                     chunk_type="doc",
                     symbol_name=f"{title} (part {chunk_index + 1})" if chunk_index > 0 else title,
                     start_line=current_start + 1,
-                    end_line=current_start + current_content.count("\n"),
-                    content=current_content.strip(),
+                    end_line=current_start + current_newlines,
+                    content="".join(current_parts).strip(),
                     language="markdown",
                 )
             )
@@ -1,9 +1,24 @@
 import asyncio
+import base64
+import hashlib
+import multiprocessing
+import os
+import pickle
+import tempfile
+import uuid
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, RateLimitError
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
 from src.config import settings
 from src.indexing.chunker import ChunkMetadata, CodeChunker, DocChunker
@@ -20,12 +35,48 @@ class EmbeddedChunk:
     end_line: int
     content: str
     language: str
-    embedding: list[float]
+    embedding: array
     docstring: str | None = None
     dependencies: list[str] | None = None
     complexity_score: int | None = None
 
 
+_CHUNK_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "agentic-code-reviewer/code-chunk")
+
+
+def _chunk_id(chunk: ChunkMetadata) -> str:
+    key = f"{chunk.file_path}|{chunk.start_line}|{chunk.end_line}|{chunk.chunk_type}|{chunk.symbol_name}"
+    return str(uuid.uuid5(_CHUNK_ID_NAMESPACE, key))
+
+
+_worker_chunkers: tuple[CodeChunker, DocChunker] | None = None
+
+
+def _init_chunk_worker(code_max_tokens: int, doc_max_tokens: int, cache_dir: Path | None) -> None:
+    global _worker_chunkers
+    code_chunker = CodeChunker(max_chunk_tokens=code_max_tokens)
+    code_chunker.cache_dir = cache_dir
+    _worker_chunkers = (code_chunker, DocChunker(max_chunk_tokens=doc_max_tokens))
+
+
+def _chunk_file(absolute_path: str, is_code: bool) -> list[ChunkMetadata]:
+    return _read_and_chunk(*_worker_chunkers, absolute_path, is_code)
+
+
+def _read_and_chunk(
+    code_chunker: CodeChunker, doc_chunker: DocChunker, absolute_path: str, is_code: bool
+) -> list[ChunkMetadata]:
+    file_path = Path(absolute_path)
+
+    try:
+        content = file_path.read_text(encoding="utf-8")
+    except (UnicodeDecodeError, OSError):
+        return []
+
+    chunker = code_chunker if is_code else doc_chunker
+    return chunker.chunk_file(file_path, content)
+
+
 class Embedder:
     def __init__(
         self,
@@ -44,23 +95,97 @@ class Embedder:
         response = await self.client.embeddings.create(input=text, model=self.model)
         return response.data[0].embedding
 
-    async def embed_batch(self, texts: list[str], batch_size: int = 100) -> list[list[float]]:
-        embeddings: list[list[float]] = []
-        
+    async def embed_batch(self, texts: list[str], batch_size: int = 100) -> list[array]:
         # Filter out empty texts
         valid_texts = [t for t in texts if t and t.strip()]
         if not valid_texts:
             return []
 
+        semaphore = asyncio.Semaphore(settings.max_concurrent_embeddings)
+
+        async def _embed_one(batch: list[str]) -> list[array]:
+            async with semaphore:
+                async for attempt in AsyncRetrying(
+                    retry=retry_if_exception_type(RateLimitError),
+                    wait=wait_random_exponential(multiplier=0.5, max=30),
+                    stop=stop_after_attempt(settings.embedding_max_retries),
+                    reraise=True,
+                ):
+                    with attempt:
+                        response = await self.client.embeddings.create(
+                            input=batch, model=self.model, encoding_format="base64"
+                        )
+            # Keep the float32 payload packed instead of expanding it into Python floats.
+            # OpenAI-compatible servers that ignore encoding_format send plain float lists.
+            return [
+                array("f", base64.b64decode(item.embedding))
+                if isinstance(item.embedding, str)
+                else array("f", item.embedding)
+                for item in response.data
+            ]
+
+        results = await asyncio.gather(
+            *(_embed_one(valid_texts[i : i + batch_size]) for i in range(0, len(valid_texts), batch_size))
+        )
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+
+
+class LocalOnnxEmbedder(Embedder):
+    MAX_SEQUENCE_TOKENS = 512
+
+    def __init__(self, model_dir: Path):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model = model_dir.name
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.MAX_SEQUENCE_TOKENS)
+        self.tokenizer.enable_padding()
+
+    def _embed_sync(self, texts: list[str]) -> list[array]:
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        # CLS pooling followed by L2 normalisation, as used by the BGE family.
+        vectors = self.session.run(None, feeds)[0][:, 0].astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return [array("f", vector.tobytes()) for vector in vectors]
+
+    async def embed_single(self, text: str) -> list[float]:
+        (embedding,) = await asyncio.to_thread(self._embed_sync, [text])
+        return embedding.tolist()
+
+    async def embed_batch(self, texts: list[str], batch_size: int = 32) -> list[array]:
+        valid_texts = [t for t in texts if t and t.strip()]
+        embeddings: list[array] = []
+
         for i in range(0, len(valid_texts), batch_size):
             batch = valid_texts[i : i + batch_size]
-            response = await self.client.embeddings.create(input=batch, model=self.model)
-            batch_embeddings = [item.embedding for item in response.data]
-            embeddings.extend(batch_embeddings)
+            embeddings.extend(await asyncio.to_thread(self._embed_sync, batch))
 
         return embeddings
 
 
+def create_embedder() -> Embedder:
+    if settings.local_embedding_model_dir:
+        return LocalOnnxEmbedder(Path(settings.local_embedding_model_dir).expanduser())
+    return Embedder()
+
+
 class RepoIngester:
     MAX_FILE_SIZE = 1_000_000
 
@@ -70,60 +195,103 @@ class RepoIngester:
         embedder: Embedder | None = None,
         code_chunker: CodeChunker | None = None,
         doc_chunker: DocChunker | None = None,
+        cache_dir: Path | None = None,
     ):
         self.repo_root = repo_root
-        self.embedder = embedder or Embedder()
+        self.embedder = embedder or create_embedder()
         self.code_chunker = code_chunker or CodeChunker()
         self.doc_chunker = doc_chunker or DocChunker()
         self.file_filter = FileFilter(repo_root)
+        if cache_dir is None and settings.chunk_cache_dir:
+            cache_dir = Path(settings.chunk_cache_dir).expanduser()
+        self.cache_dir = cache_dir
 
     async def ingest(self) -> tuple[list[EmbeddedChunk], list[dict[str, Any]]]:
-        file_manifest = filter_files(self.repo_root, self.file_filter)
-        all_chunks: list[ChunkMetadata] = []
-
-        for file_info in file_manifest:
-            file_path = Path(file_info["absolute_path"])
-
-            if file_info["size"] > self.MAX_FILE_SIZE:
-                continue
-
-            try:
-                content = file_path.read_text(encoding="utf-8")
-            except (UnicodeDecodeError, OSError):
-                continue
-
-            if file_info["is_code"]:
-                chunks = self.code_chunker.chunk_file(file_path, content)
-            elif file_info["is_doc"]:
-                chunks = self.doc_chunker.chunk_file(file_path, content)
-            else:
-                continue
+        file_manifest = await asyncio.to_thread(filter_files, self.repo_root, self.file_filter)
+        to_chunk = [
+            file_info
+            for file_info in file_manifest
+            if file_info["size"] <= self.MAX_FILE_SIZE and (file_info["is_code"] or file_info["is_doc"])
+        ]
 
+        all_chunks: list[ChunkMetadata] = []
+        for chunks in await self._chunk_files(to_chunk):
             all_chunks.extend(chunks)
 
         embedded_chunks = await self._embed_chunks(all_chunks)
 
         return embedded_chunks, file_manifest
 
+    async def _chunk_files(self, to_chunk: list[dict[str, Any]]) -> list[list[ChunkMetadata]]:
+        workers = min(settings.ingest_workers or os.cpu_count() or 1, len(to_chunk))
+        # Each spawned worker re-imports the tokenizer stack and loads its BPE table, which
+        # only pays off once there is enough text to chunk.
+        total_bytes = sum(file_info["size"] for file_info in to_chunk)
+        if workers <= 1 or total_bytes < settings.ingest_process_min_bytes:
+            return [
+                await asyncio.to_thread(
+                    _read_and_chunk,
+                    self.code_chunker,
+                    self.doc_chunker,
+                    file_info["absolute_path"],
+                    file_info["is_code"],
+                )
+                for file_info in to_chunk
+            ]
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_chunk_worker,
+            initargs=(
+                self.code_chunker.max_chunk_tokens,
+                self.doc_chunker.max_chunk_tokens,
+                self.code_chunker.cache_dir,
+            ),
+        ) as pool:
+            return await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        pool, _chunk_file, file_info["absolute_path"], file_info["is_code"]
+                    )
+                    for file_info in to_chunk
+                )
+            )
+
     async def _embed_chunks(self, chunks: list[ChunkMetadata]) -> list[EmbeddedChunk]:
         if not chunks:
             return []
 
-        import uuid
-
         # Filter out chunks with empty content
         valid_chunks = [c for c in chunks if c.content and c.content.strip()]
         if not valid_chunks:
             return []
 
         texts = [self._prepare_text_for_embedding(chunk) for chunk in valid_chunks]
-        embeddings = await self.embedder.embed_batch(texts)
+        text_hashes = [hashlib.blake2b(text.encode(), digest_size=16).hexdigest() for text in texts]
+
+        cache_path = self._embedding_cache_path()
+        known = await asyncio.to_thread(self._load_embeddings, cache_path) if cache_path else {}
+
+        missing = {
+            text_hash: text
+            for text_hash, text in zip(text_hashes, texts, strict=True)
+            if text_hash not in known
+        }
+        if missing:
+            fresh = await self.embedder.embed_batch(list(missing.values()))
+            known.update(zip(missing, fresh, strict=True))
+
+        embeddings = {text_hash: known[text_hash] for text_hash in text_hashes}
+        if cache_path is not None and missing:
+            await asyncio.to_thread(self._store_embeddings, cache_path, embeddings)
 
         embedded_chunks: list[EmbeddedChunk] = []
-        for i, chunk in enumerate(valid_chunks):
+        for chunk, text_hash in zip(valid_chunks, text_hashes, strict=True):
             embedded_chunks.append(
                 EmbeddedChunk(
-                    id=str(uuid.uuid4()),
+                    id=_chunk_id(chunk),
                     file_path=chunk.file_path,
                     chunk_type=chunk.chunk_type,
                     symbol_name=chunk.symbol_name,
@@ -131,7 +299,7 @@ class RepoIngester:
                     end_line=chunk.end_line,
                     content=chunk.content,
                     language=chunk.language,
-                    embedding=embeddings[i],
+                    embedding=embeddings[text_hash],
                     docstring=chunk.docstring,
                     dependencies=chunk.dependencies,
                     complexity_score=chunk.complexity_score,
@@ -140,6 +308,32 @@ class RepoIngester:
 
         return embedded_chunks
 
+    def _embedding_cache_path(self) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        key = f"{self.repo_root.resolve()}|{self.embedder.model}"
+        digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return self.cache_dir / "embeddings" / f"{digest}.pickle"
+
+    @staticmethod
+    def _load_embeddings(cache_path: Path) -> dict[str, array]:
+        try:
+            with cache_path.open("rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return {}
+
+    @staticmethod
+    def _store_embeddings(cache_path: Path, embeddings: dict[str, array]) -> None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(embeddings, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
     def _prepare_text_for_embedding(self, chunk: ChunkMetadata) -> str:
         parts: list[str] = []
 
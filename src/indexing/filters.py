@@ -1,14 +1,44 @@
 import fnmatch
+import os
+import re
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Any
 
+import pathspec
+
 from src.config import settings
 
+_NEVER = re.compile(r"(?!)")
+
+
+def _compile_alternatives(alternatives: list[str]) -> re.Pattern[str]:
+    if not alternatives:
+        return _NEVER
+    return re.compile("|".join(alternatives))
+
 
 class IgnoreFilter:
     def __init__(self, ignore_patterns: list[str] | None = None):
         self.ignore_patterns = ignore_patterns or settings.ignore_patterns
-        self._compiled_patterns: list[str] = []
+
+        prefix_alternatives: list[str] = []
+        path_alternatives: list[str] = []
+        part_alternatives: list[str] = []
+
+        for pattern in self.ignore_patterns:
+            if pattern.endswith("/"):
+                prefix_alternatives.append(rf"(?s:{re.escape(pattern[:-1])}(?:/.*)?)\Z")
+                # "dir/" matched against "path/" is the same as "dir" matched against "path".
+                path_alternatives.append(fnmatch.translate(pattern[:-1]))
+            path_alternatives.append(fnmatch.translate(pattern))
+            path_alternatives.append(fnmatch.translate(f"**/{pattern}"))
+            if "/" not in pattern:
+                part_alternatives.append(fnmatch.translate(pattern))
+
+        self._prefix_regex = _compile_alternatives(prefix_alternatives)
+        self._path_regex = _compile_alternatives(prefix_alternatives + path_alternatives)
+        self._part_regex = _compile_alternatives(part_alternatives)
 
     def should_ignore(self, path: Path, repo_root: Path) -> bool:
         try:
@@ -18,87 +48,57 @@ class IgnoreFilter:
 
         relative_str = str(relative_path)
 
-        for pattern in self.ignore_patterns:
-            if self._matches_pattern(relative_str, pattern):
-                return True
-
-        return False
+        if self._path_regex.match(relative_str):
+            return True
 
-    def _matches_pattern(self, path: str, pattern: str) -> bool:
-        if pattern.endswith("/"):
-            dir_pattern = pattern[:-1]
-            if path.startswith(dir_pattern + "/") or path == dir_pattern:
-                return True
-            if fnmatch.fnmatch(path + "/", pattern):
-                return True
+        part_match = self._part_regex.match
+        return any(part_match(part) for part in relative_str.split("/"))
 
-        if fnmatch.fnmatch(path, pattern):
+    def should_ignore_dir(self, path: Path, repo_root: Path) -> bool:
+        try:
+            relative_path = path.relative_to(repo_root)
+        except ValueError:
             return True
 
-        if fnmatch.fnmatch(path, f"**/{pattern}"):
+        if self._prefix_regex.match(str(relative_path)):
             return True
 
-        if "/" not in pattern:
-            parts = path.split("/")
-            for part in parts:
-                if fnmatch.fnmatch(part, pattern):
-                    return True
-
-        return False
+        return self._part_regex.match(path.name) is not None
 
 
 class GitIgnoreFilter:
     def __init__(self, repo_root: Path):
         self.repo_root = repo_root
-        self.patterns: list[tuple[str, bool]] = []
-        self._load_gitignore()
+        self.spec = self._load_gitignore()
 
-    def _load_gitignore(self) -> None:
+    def _load_gitignore(self) -> pathspec.GitIgnoreSpec:
         gitignore_path = self.repo_root / ".gitignore"
-        if gitignore_path.exists():
-            with open(gitignore_path) as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-
-                    is_negation = line.startswith("!")
-                    if is_negation:
-                        line = line[1:]
+        if not gitignore_path.exists():
+            return pathspec.GitIgnoreSpec([])
 
-                    self.patterns.append((line, is_negation))
+        with open(gitignore_path) as f:
+            return pathspec.GitIgnoreSpec.from_lines(f)
 
-    def should_ignore(self, path: Path) -> bool:
+    def _relative(self, path: Path) -> str | None:
         try:
-            relative_path = path.relative_to(self.repo_root)
+            return str(path.relative_to(self.repo_root))
         except ValueError:
-            return True
-
-        relative_str = str(relative_path)
-        result = False
+            return None
 
-        for pattern, is_negation in self.patterns:
-            if self._matches_gitignore_pattern(relative_str, pattern):
-                result = not is_negation
+    def should_ignore(self, path: Path) -> bool:
+        relative_str = self._relative(path)
+        if relative_str is None:
+            return True
 
-        return result
+        return self.spec.match_file(relative_str)
 
-    def _matches_gitignore_pattern(self, path: str, pattern: str) -> bool:
-        if pattern.startswith("/"):
-            if path == pattern[1:] or path.startswith(pattern[1:] + "/"):
-                return True
-        elif pattern.endswith("/"):
-            if path.startswith(pattern) or ("/" + path).startswith("/" + pattern):
-                return True
-        else:
-            if fnmatch.fnmatch(path, pattern):
-                return True
-            if fnmatch.fnmatch(path, f"**/{pattern}"):
-                return True
-            if fnmatch.fnmatch(path, f"*/{pattern}"):
-                return True
+    def should_ignore_dir(self, path: Path) -> bool:
+        # Git never re-includes files below an excluded directory, so the subtree can be skipped.
+        relative_str = self._relative(path)
+        if relative_str is None:
+            return True
 
-        return False
+        return self.spec.match_file(relative_str + "/")
 
 
 class FileFilter:
@@ -150,6 +150,12 @@ class FileFilter:
         ".sqlite3",
     }
 
+    CODE_EXTENSIONS = frozenset({".py", ".js", ".ts", ".jsx", ".tsx"})
+    DOC_EXTENSIONS = frozenset({".md", ".txt", ".rst"})
+    CONFIG_EXTENSIONS = frozenset({".yaml", ".yml", ".toml", ".cfg", ".ini", ".json"})
+
+    PRUNED_DIRS = {".git", "node_modules", "__pycache__", ".venv"}
+
     def __init__(
         self,
         repo_root: Path,
@@ -165,51 +171,96 @@ class FileFilter:
         if not path.is_file():
             return False
 
-        if self.ignore_filter.should_ignore(path, self.repo_root):
-            return False
+        return self._should_include_file(path, path.suffix.lower())
 
-        if self.gitignore_filter.should_ignore(path):
-            return False
+    def should_ignore_dir(self, path: Path) -> bool:
+        if path.name in self.PRUNED_DIRS:
+            return True
+
+        if self.ignore_filter.should_ignore_dir(path, self.repo_root):
+            return True
+
+        return self.gitignore_filter.should_ignore_dir(path)
+
+    def walk_files(self) -> Iterator[tuple[os.DirEntry[str], Path, str]]:
+        stack = [str(self.repo_root)]
+
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        path = Path(entry.path)
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self.should_ignore_dir(path):
+                                stack.append(entry.path)
+                            continue
+
+                        suffix = path.suffix.lower()
+                        if entry.is_file() and self._should_include_file(path, suffix):
+                            yield entry, path, suffix
+            except OSError:
+                continue
 
-        extension = path.suffix.lower()
+    def _should_include_file(self, path: Path, suffix: str) -> bool:
+        if suffix in self.BINARY_EXTENSIONS:
+            return False
 
-        if extension in self.BINARY_EXTENSIONS:
+        if self.ignore_filter.should_ignore(path, self.repo_root):
             return False
 
-        return True
+        return not self.gitignore_filter.should_ignore(path)
+
+    def classify(self, path: Path, suffix: str | None = None) -> tuple[bool, bool, bool]:
+        if suffix is None:
+            suffix = path.suffix.lower()
+        return (
+            suffix in self.CODE_EXTENSIONS,
+            suffix in self.DOC_EXTENSIONS,
+            suffix in self.CONFIG_EXTENSIONS,
+        )
 
     def is_code_file(self, path: Path) -> bool:
-        return path.suffix.lower() in {".py", ".js", ".ts", ".jsx", ".tsx"}
+        return path.suffix.lower() in self.CODE_EXTENSIONS
 
     def is_doc_file(self, path: Path) -> bool:
-        return path.suffix.lower() in {".md", ".txt", ".rst"}
+        return path.suffix.lower() in self.DOC_EXTENSIONS
 
     def is_config_file(self, path: Path) -> bool:
-        return path.suffix.lower() in {".yaml", ".yml", ".toml", ".cfg", ".ini", ".json"}
+        return path.suffix.lower() in self.CONFIG_EXTENSIONS
 
 
 def filter_files(repo_root: Path, file_filter: FileFilter | None = None) -> list[dict[str, Any]]:
+    files, _ = filter_files_with_size(repo_root, file_filter)
+    return files
+
+
+def filter_files_with_size(
+    repo_root: Path, file_filter: FileFilter | None = None
+) -> tuple[list[dict[str, Any]], int]:
     if file_filter is None:
         file_filter = FileFilter(repo_root)
 
     files: list[dict[str, Any]] = []
+    total_size = 0
 
-    for path in repo_root.rglob("*"):
-        if file_filter.should_include(path):
-            try:
-                stat = path.stat()
-                files.append(
-                    {
-                        "path": str(path.relative_to(repo_root)),
-                        "absolute_path": str(path),
-                        "size": stat.st_size,
-                        "extension": path.suffix.lower(),
-                        "is_code": file_filter.is_code_file(path),
-                        "is_doc": file_filter.is_doc_file(path),
-                        "is_config": file_filter.is_config_file(path),
-                    }
-                )
-            except OSError:
-                continue
-
-    return files
+    for entry, path, suffix in file_filter.walk_files():
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+
+        is_code, is_doc, is_config = file_filter.classify(path, suffix)
+        files.append(
+            {
+                "path": str(path.relative_to(repo_root)),
+                "absolute_path": str(path),
+                "size": stat.st_size,
+                "extension": suffix,
+                "is_code": is_code,
+                "is_doc": is_doc,
+                "is_config": is_config,
+            }
+        )
+        total_size += stat.st_size
+
+    return files, total_size
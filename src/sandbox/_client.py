@@ -0,0 +1,10 @@
+from functools import cache
+
+import docker
+
+DOCKER_MAX_POOL_SIZE = 20
+
+
+@cache
+def get_docker_client() -> docker.DockerClient:
+    return docker.from_env(version="auto", max_pool_size=DOCKER_MAX_POOL_SIZE)
@@ -1,8 +1,20 @@
 import asyncio
-import shutil
+import contextlib
+import copy
+import os
+import selectors
+import shlex
+import socket
+import struct
 import subprocess
-import tempfile
+import sys
+import tarfile
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -11,6 +23,145 @@ import docker
 from docker.errors import APIError, BuildError, DockerException
 
 from src.config import settings
+from src.sandbox._client import get_docker_client
+
+
+_FRAME_HEADER = struct.Struct(">BxxxL")
+_TAR_CHUNK_SIZE = 64 * 1024
+_CLEANUP_WORKERS = 16
+_MAX_TRACKED_CONTAINERS = 256
+_MAX_OUTPUT_BYTES = 10 * 1024 * 1024
+_PIPE_READ_SIZE = 64 * 1024
+
+
+class _SendfileTarFile(tarfile.TarFile):
+    """Uncompressed stream-mode tar writer that copies regular file payloads with os.sendfile."""
+
+    def addfile(self, tarinfo: tarfile.TarInfo, fileobj: Any = None) -> None:
+        stream = self.fileobj
+        if (
+            fileobj is None
+            or not tarinfo.isreg()
+            or not sys.platform.startswith("linux")
+            or not isinstance(stream, tarfile._Stream)
+            or stream.comptype != "tar"
+        ):
+            super().addfile(tarinfo, fileobj)
+            return
+
+        self._check("awx")
+        tarinfo = copy.copy(tarinfo)
+
+        header = tarinfo.tobuf(self.format, self.encoding, self.errors)
+        stream.write(header)
+        self.offset += len(header)
+        stream.fileobj.write(stream.buf)
+        stream.buf = b""
+        stream.fileobj.flush()
+
+        out_fd, in_fd = stream.fileobj.fileno(), fileobj.fileno()
+        offset = fileobj.tell()
+        remaining = tarinfo.size
+        while remaining:
+            sent = os.sendfile(out_fd, in_fd, offset, remaining)
+            if sent == 0:
+                raise tarfile.ReadError("unexpected end of data")
+            offset += sent
+            remaining -= sent
+        stream.pos += tarinfo.size
+
+        blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+        if remainder:
+            stream.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            blocks += 1
+        self.offset += blocks * tarfile.BLOCKSIZE
+        self.members.append(tarinfo)
+
+
+class _SandboxShell:
+    """A long-lived ``sh`` exec session that runs commands without a Docker API call each."""
+
+    def __init__(self, sock: Any):
+        self.sock = sock
+
+    def run(
+        self, command: list[str], workdir: str, timeout: float, stdin: str | None = None
+    ) -> tuple[int, bytes, bytes]:
+        token = f"__sandbox_done_{uuid.uuid4().hex}__"
+        marker = token.encode()
+        redirect = "</dev/null"
+        if stdin:
+            # The random token doubles as the here-document delimiter.
+            body = stdin.removesuffix("\n")
+            redirect = f"<<'{token}'\n{body}\n{token}"
+        script = (
+            f"(cd {shlex.quote(workdir)} && exec {shlex.join(command)}) {redirect}\n"
+            f"printf '\\n%s%d\\n' {token} $?; printf '\\n%s\\n' {token} >&2\n"
+        )
+        deadline = time.monotonic() + timeout
+        self.sock.settimeout(timeout)
+        self.sock.sendall(script.encode())
+
+        output = {1: bytearray(), 2: bytearray()}
+        ends: dict[int, int] = {}
+        done: set[int] = set()
+        while len(done) < 2:
+            stream, payload = self._read_frame(deadline)
+            buffer = output.get(stream)
+            if buffer is None or stream in done:
+                continue
+            searched = max(len(buffer) - len(marker), 0)
+            buffer += payload
+            if stream not in ends:
+                end = buffer.find(b"\n" + marker, searched)
+                if end == -1:
+                    continue
+                ends[stream] = end
+            if buffer.find(b"\n", ends[stream] + 1) != -1:
+                done.add(stream)
+
+        stdout, stderr = output[1], output[2]
+        exit_code = int(stdout[ends[1] + 1 + len(marker) :].strip())
+        return exit_code, bytes(stdout[: ends[1]]), bytes(stderr[: ends[2]])
+
+    def communicate(self, stdin: str | None, timeout: float) -> tuple[bytes, bytes]:
+        """Write stdin, close the write side and collect output until the exec exits."""
+        deadline = time.monotonic() + timeout
+        self.sock.settimeout(timeout)
+        if stdin:
+            self.sock.sendall(stdin.encode())
+        self.sock.shutdown(socket.SHUT_WR)
+
+        output = {1: bytearray(), 2: bytearray()}
+        while header := self._read_exactly(_FRAME_HEADER.size, deadline, eof_ok=True):
+            stream, size = _FRAME_HEADER.unpack(header)
+            payload = self._read_exactly(size, deadline)
+            if stream in output:
+                output[stream] += payload
+        return bytes(output[1]), bytes(output[2])
+
+    def _read_frame(self, deadline: float) -> tuple[int, bytes]:
+        stream, size = _FRAME_HEADER.unpack(self._read_exactly(_FRAME_HEADER.size, deadline))
+        return stream, self._read_exactly(size, deadline)
+
+    def _read_exactly(self, size: int, deadline: float, eof_ok: bool = False) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            self.sock.settimeout(remaining)
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                if eof_ok and not data:
+                    return b""
+                raise ConnectionError("Sandbox shell closed")
+            data += chunk
+        return bytes(data)
+
+    def close(self) -> None:
+        with contextlib.suppress(OSError):
+            self.sock.close()
 
 
 @dataclass
@@ -35,15 +186,16 @@ class SandboxResult:
 
 
 class DockerSandboxManager:
-    def __init__(self, config: SandboxConfig | None = None):
+    def __init__(self, config: SandboxConfig | None = None, client: docker.DockerClient | None = None):
         self.config = config or SandboxConfig()
-        self._client: docker.DockerClient | None = None
-        self._containers: dict[str, Any] = {}
+        self._client = client
+        self._containers: OrderedDict[str, Any] = OrderedDict()
+        self._shells: dict[str, _SandboxShell] = {}
 
     @property
     def client(self) -> docker.DockerClient:
         if self._client is None:
-            self._client = docker.from_env()
+            self._client = get_docker_client()
         return self._client
 
     def create_sandbox(self, sandbox_id: str | None = None) -> str:
@@ -62,7 +214,7 @@ class DockerSandboxManager:
                 labels={"sandbox_id": sandbox_id, "created_by": "code-reviewer"},
             )
 
-            self._containers[sandbox_id] = container
+            self._remember_container(sandbox_id, container)
             return sandbox_id
 
         except DockerException as e:
@@ -90,15 +242,16 @@ class DockerSandboxManager:
         except DockerException:
             return False
 
-    def remove_sandbox(self, sandbox_id: str) -> bool:
-        container = self._get_container(sandbox_id)
+    def remove_sandbox(self, sandbox_id: str, container: Any = None) -> bool:
+        self._close_shell(sandbox_id)
+        if container is None:
+            container = self._get_container(sandbox_id)
         if container is None:
             return True
 
         try:
             container.remove(force=True)
-            if sandbox_id in self._containers:
-                del self._containers[sandbox_id]
+            self._containers.pop(sandbox_id, None)
             return True
         except DockerException:
             return False
@@ -114,43 +267,41 @@ class DockerSandboxManager:
 
         try:
             if source_path.is_file():
-                with tempfile.NamedTemporaryFile() as tmp:
-                    shutil.copy(source_path, tmp.name)
-                    with open(tmp.name, "rb") as f:
-                        container.put_archive(str(Path(dest_path).parent), self._create_tar(f, source_path.name))
+                container.put_archive(str(Path(dest_path).parent), self._stream_tar(source_path))
             else:
-                with tempfile.NamedTemporaryFile() as tmp:
-                    tar_path = self._create_tar_from_dir(source_path, tmp.name)
-                    with open(tar_path, "rb") as f:
-                        container.put_archive(dest_path, f.read())
+                container.put_archive(dest_path, self._stream_tar(source_path))
 
             return True
         except Exception:
             return False
 
-    def _create_tar(self, file_obj: Any, name: str) -> bytes:
-        import io
-        import tarfile
-
-        tar_stream = io.BytesIO()
-        with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            info = tarfile.TarInfo(name=name)
-            content = file_obj.read()
-            info.size = len(content)
-            tar.addfile(info, io.BytesIO(content))
-
-        return tar_stream.getvalue()
-
-    def _create_tar_from_dir(self, source_dir: Path, dest_path: str) -> str:
-        import tarfile
-
-        with tarfile.open(dest_path, "w") as tar:
-            for file_path in source_dir.rglob("*"):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(source_dir)
-                    tar.add(file_path, arcname=arcname)
-
-        return dest_path
+    def _stream_tar(self, source_path: Path) -> Iterator[bytes]:
+        # The tar is written on one end of a pipe while the upload reads the other,
+        # so only a pipe buffer of the archive is ever held in memory.
+        read_fd, write_fd = os.pipe()
+        errors: list[BaseException] = []
+
+        def _write() -> None:
+            try:
+                with os.fdopen(write_fd, "wb") as pipe, _SendfileTarFile.open(fileobj=pipe, mode="w|") as tar:
+                    if source_path.is_file():
+                        tar.add(source_path, arcname=source_path.name)
+                        return
+                    for file_path in source_path.rglob("*"):
+                        if file_path.is_file():
+                            tar.add(file_path, arcname=file_path.relative_to(source_path))
+            except BaseException as e:
+                errors.append(e)
+
+        writer = threading.Thread(target=_write, daemon=True)
+        writer.start()
+        with os.fdopen(read_fd, "rb") as pipe:
+            while chunk := pipe.read(_TAR_CHUNK_SIZE):
+                yield chunk
+        writer.join()
+
+        if errors:
+            raise errors[0]
 
     def execute_in_sandbox(
         self,
@@ -158,6 +309,7 @@ class DockerSandboxManager:
         command: list[str],
         workdir: str | None = None,
         timeout: int | None = None,
+        stdin: str | None = None,
     ) -> SandboxResult:
         container = self._get_container(sandbox_id)
         if container is None:
@@ -174,19 +326,32 @@ class DockerSandboxManager:
         timeout = timeout or self.config.timeout_seconds
         workdir = workdir or self.config.workdir
 
-        import time
-
         start_time = time.time()
 
         try:
-            exit_code, output = container.exec_run(
-                cmd=command,
-                workdir=workdir,
-                demux=True,
-            )
-
-            stdout = (output[0] or b"").decode("utf-8", errors="replace")
-            stderr = (output[1] or b"").decode("utf-8", errors="replace")
+            try:
+                shell = self._get_shell(sandbox_id, container)
+            except (OSError, DockerException):
+                shell = None
+
+            try:
+                if shell is not None:
+                    exit_code, stdout_bytes, stderr_bytes = shell.run(command, workdir, timeout, stdin)
+                else:
+                    exit_code, stdout_bytes, stderr_bytes = self._exec_once(
+                        container, command, workdir, timeout, stdin
+                    )
+            except TimeoutError:
+                self._close_shell(sandbox_id)
+                raise TimeoutError(f"Command timed out after {timeout} seconds") from None
+            except (OSError, ValueError):
+                # The command may already have run in the shell that died, so it is not
+                # retried: applying a patch twice is worse than reporting the failure.
+                self._close_shell(sandbox_id)
+                raise
+
+            stdout = stdout_bytes.decode("utf-8", errors="replace")
+            stderr = stderr_bytes.decode("utf-8", errors="replace")
 
             duration_ms = int((time.time() - start_time) * 1000)
 
@@ -212,9 +377,45 @@ class DockerSandboxManager:
                 duration_ms=duration_ms,
             )
 
+    def _get_shell(self, sandbox_id: str, container: Any) -> _SandboxShell:
+        shell = self._shells.get(sandbox_id)
+        if shell is None:
+            exec_id = self.client.api.exec_create(container.id, ["/bin/sh"], stdin=True)["Id"]
+            sock = self.client.api.exec_start(exec_id, socket=True)
+            shell = self._shells[sandbox_id] = _SandboxShell(getattr(sock, "_sock", sock))
+        return shell
+
+    def _exec_once(
+        self, container: Any, command: list[str], workdir: str, timeout: float, stdin: str | None
+    ) -> tuple[int, bytes, bytes]:
+        # stdin goes through the exec socket rather than argv, which is capped by ARG_MAX.
+        exec_id = self.client.api.exec_create(
+            container.id, command, stdin=stdin is not None, workdir=workdir
+        )["Id"]
+        sock = self.client.api.exec_start(exec_id, socket=True)
+        session = _SandboxShell(getattr(sock, "_sock", sock))
+        try:
+            stdout, stderr = session.communicate(stdin, timeout)
+        finally:
+            session.close()
+        return self.client.api.exec_inspect(exec_id)["ExitCode"], stdout, stderr
+
+    def _close_shell(self, sandbox_id: str) -> None:
+        shell = self._shells.pop(sandbox_id, None)
+        if shell is not None:
+            shell.close()
+
+    def _remember_container(self, sandbox_id: str, container: Any) -> None:
+        self._containers[sandbox_id] = container
+        self._containers.move_to_end(sandbox_id)
+        if len(self._containers) > _MAX_TRACKED_CONTAINERS:
+            self._containers.popitem(last=False)
+
     def _get_container(self, sandbox_id: str) -> Any:
-        if sandbox_id in self._containers:
-            return self._containers[sandbox_id]
+        container = self._containers.get(sandbox_id)
+        if container is not None:
+            self._containers.move_to_end(sandbox_id)
+            return container
 
         try:
             containers = self.client.containers.list(
@@ -222,7 +423,7 @@ class DockerSandboxManager:
                 filters={"name": f"code-reviewer-{sandbox_id}"},
             )
             if containers:
-                self._containers[sandbox_id] = containers[0]
+                self._remember_container(sandbox_id, containers[0])
                 return containers[0]
         except DockerException:
             pass
@@ -267,14 +468,23 @@ class DockerSandboxManager:
             return []
 
     def cleanup_all_sandboxes(self) -> int:
-        containers = self.list_sandboxes()
-        cleaned = 0
+        try:
+            containers = self.client.containers.list(
+                all=True,
+                filters={"label": "created_by=code-reviewer"},
+            )
+        except DockerException:
+            return 0
 
-        for container_info in containers:
-            if self.remove_sandbox(container_info["sandbox_id"]):
-                cleaned += 1
+        if not containers:
+            return 0
 
-        return cleaned
+        with ThreadPoolExecutor(max_workers=min(len(containers), _CLEANUP_WORKERS)) as pool:
+            removed = pool.map(
+                lambda c: self.remove_sandbox(c.labels.get("sandbox_id", ""), c),
+                containers,
+            )
+            return sum(removed)
 
 
 class LocalExecutor:
@@ -287,8 +497,6 @@ class LocalExecutor:
         timeout: int = 300,
         env: dict[str, str] | None = None,
     ) -> SandboxResult:
-        import time
-
         start_time = time.time()
 
         merged_env = subprocess.os.environ.copy()
@@ -296,24 +504,25 @@ class LocalExecutor:
             merged_env.update(env)
 
         try:
-            result = subprocess.run(
+            with subprocess.Popen(
                 command,
                 cwd=str(self.workdir),
-                capture_output=True,
-                text=True,
-                timeout=timeout,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 env=merged_env,
-            )
+            ) as process:
+                stdout, stderr = self._read_capped(process, timeout)
+                returncode = process.wait()
 
             duration_ms = int((time.time() - start_time) * 1000)
 
             return SandboxResult(
                 sandbox_id="local",
                 container_id="local",
-                success=result.returncode == 0,
-                exit_code=result.returncode,
-                stdout=result.stdout,
-                stderr=result.stderr,
+                success=returncode == 0,
+                exit_code=returncode,
+                stdout=stdout,
+                stderr=stderr,
                 duration_ms=duration_ms,
             )
 
@@ -339,3 +548,38 @@ class LocalExecutor:
                 stderr=str(e),
                 duration_ms=duration_ms,
             )
+
+    @staticmethod
+    def _read_capped(process: subprocess.Popen[bytes], timeout: float) -> tuple[str, str]:
+        # Keep draining both pipes past the cap so the child never blocks on a full pipe.
+        deadline = time.monotonic() + timeout
+        buffers = {process.stdout: bytearray(), process.stderr: bytearray()}
+        truncated: set[Any] = set()
+
+        with selectors.DefaultSelector() as selector:
+            for pipe in buffers:
+                selector.register(pipe, selectors.EVENT_READ)
+
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    process.kill()
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+
+                for key, _ in selector.select(remaining):
+                    chunk = os.read(key.fd, _PIPE_READ_SIZE)
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        continue
+                    buffer = buffers[key.fileobj]
+                    room = _MAX_OUTPUT_BYTES - len(buffer)
+                    if len(chunk) > room:
+                        truncated.add(key.fileobj)
+                        chunk = chunk[:room]
+                    buffer += chunk
+
+        stdout, stderr = (
+            buffer.decode("utf-8", errors="replace") + ("\n[truncated]" if pipe in truncated else "")
+            for pipe, buffer in buffers.items()
+        )
+        return stdout, stderr
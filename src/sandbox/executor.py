@@ -1,14 +1,34 @@
+import re
 import subprocess
-import tempfile
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import unidiff
-
 from src.agent.state import PatchResult
+from src.diff import ParsedDiff, parse_diff
 from src.sandbox.docker_manager import DockerSandboxManager, LocalExecutor
 
+_SECRET_KEYWORD_RE = re.compile(
+    "|".join(
+        re.escape(keyword)
+        for keyword in (
+            "api_key",
+            "apikey",
+            "secret_key",
+            "secretkey",
+            "password",
+            "passwd",
+            "token",
+            "bearer",
+            "auth",
+            "credential",
+        )
+    )
+)
+_SECRET_VALUE_RE = re.compile(
+    r"sk-[a-zA-Z0-9]{20,}|AKIA[0-9A-Z]{16}|ghp_[a-zA-Z0-9]{36}|[a-zA-Z0-9]{32,}"
+)
+
 
 @dataclass
 class PatchValidationResult:
@@ -20,6 +40,7 @@ class PatchValidationResult:
     files_affected: list[str]
     lines_added: int
     lines_removed: int
+    parsed_diff: ParsedDiff | None = None
 
 
 class PatchApplier:
@@ -41,7 +62,7 @@ class PatchApplier:
         warnings: list[str] = []
 
         try:
-            patch_set = unidiff.PatchSet(diff_content)
+            parsed = parse_diff(diff_content)
         except Exception as e:
             return PatchValidationResult(
                 valid=False,
@@ -54,17 +75,13 @@ class PatchApplier:
                 lines_removed=0,
             )
 
+        patch_set = parsed.patch_set
         hunks_total = 0
-        lines_added = 0
-        lines_removed = 0
-        files_affected: list[str] = []
-
-        for patched_file in patch_set:
-            file_path = patched_file.path
-            if file_path.startswith("a/"):
-                file_path = file_path[2:]
-            files_affected.append(file_path)
+        lines_added = parsed.lines_added
+        lines_removed = parsed.lines_removed
+        files_affected = list(parsed.files)
 
+        for patched_file, file_path in zip(patch_set, files_affected, strict=True):
             for pattern in self.FORBIDDEN_PATTERNS:
                 if pattern in file_path:
                     errors.append(f"Forbidden path pattern: {pattern} in {file_path}")
@@ -72,12 +89,8 @@ class PatchApplier:
             for hunk in patched_file:
                 hunks_total += 1
                 for line in hunk:
-                    if line.is_added:
-                        lines_added += 1
-                        if self._contains_secret(line.value):
-                            errors.append(f"Potential secret in added line: {file_path}:{hunk.target_start}")
-                    elif line.is_removed:
-                        lines_removed += 1
+                    if line.is_added and self._contains_secret(line.value):
+                        errors.append(f"Potential secret in added line: {file_path}:{hunk.target_start}")
 
         total_lines = lines_added + lines_removed
         if total_lines > self.MAX_DIFF_LINES:
@@ -99,49 +112,24 @@ class PatchApplier:
             files_affected=files_affected,
             lines_added=lines_added,
             lines_removed=lines_removed,
+            parsed_diff=parsed,
         )
 
     def _contains_secret(self, line: str) -> bool:
-        secret_patterns = [
-            "api_key",
-            "apikey",
-            "secret_key",
-            "secretkey",
-            "password",
-            "passwd",
-            "token",
-            "bearer",
-            "auth",
-            "credential",
-        ]
-
-        line_lower = line.lower()
-        for pattern in secret_patterns:
-            if pattern in line_lower and "=" in line:
-                return True
-
-        import re
-
-        patterns = [
-            r"sk-[a-zA-Z0-9]{20,}",
-            r"AKIA[0-9A-Z]{16}",
-            r"ghp_[a-zA-Z0-9]{36}",
-            r"[a-zA-Z0-9]{32,}",
-        ]
+        if "=" in line and _SECRET_KEYWORD_RE.search(line.lower()):
+            return True
 
-        for pattern in patterns:
-            if re.search(pattern, line):
-                return True
-
-        return False
+        return _SECRET_VALUE_RE.search(line) is not None
 
     def apply_patch(
         self,
         repo_path: Path,
         diff_content: str,
         sandbox_id: str | None = None,
+        validation: PatchValidationResult | None = None,
     ) -> PatchResult:
-        validation = self.validate_diff(diff_content)
+        if validation is None:
+            validation = self.validate_diff(diff_content)
 
         if not validation.valid:
             return PatchResult(
@@ -151,32 +139,18 @@ class PatchApplier:
             )
 
         if sandbox_id and self.sandbox_manager:
-            return self._apply_in_sandbox(repo_path, diff_content, sandbox_id)
+            return self._apply_in_sandbox(
+                repo_path, diff_content, sandbox_id, validation.files_affected
+            )
         else:
-            return self._apply_local(repo_path, diff_content)
-
-    def _apply_local(self, repo_path: Path, diff_content: str) -> PatchResult:
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".diff", delete=False) as f:
-            f.write(diff_content)
-            diff_path = f.name
+            return self._apply_local(repo_path, diff_content, validation.files_affected)
 
+    def _apply_local(self, repo_path: Path, diff_content: str, files_affected: list[str]) -> PatchResult:
         try:
+            # git apply is all-or-nothing, so a separate --check pass would only repeat the work.
             result = subprocess.run(
-                ["git", "apply", "--check", diff_path],
-                cwd=str(repo_path),
-                capture_output=True,
-                text=True,
-            )
-
-            if result.returncode != 0:
-                return PatchResult(
-                    success=False,
-                    error=f"Patch would not apply cleanly: {result.stderr}",
-                    files_modified=[],
-                )
-
-            result = subprocess.run(
-                ["git", "apply", diff_path],
+                ["git", "apply", "-"],
+                input=diff_content,
                 cwd=str(repo_path),
                 capture_output=True,
                 text=True,
@@ -189,10 +163,9 @@ class PatchApplier:
                     files_modified=[],
                 )
 
-            validation = self.validate_diff(diff_content)
             return PatchResult(
                 success=True,
-                files_modified=validation.files_affected,
+                files_modified=files_affected,
             )
 
         except Exception as e:
@@ -201,42 +174,18 @@ class PatchApplier:
                 error=str(e),
                 files_modified=[],
             )
-        finally:
-            Path(diff_path).unlink(missing_ok=True)
 
-    def _apply_in_sandbox(self, repo_path: Path, diff_content: str, sandbox_id: str) -> PatchResult:
+    def _apply_in_sandbox(
+        self, repo_path: Path, diff_content: str, sandbox_id: str, files_affected: list[str]
+    ) -> PatchResult:
         if not self.sandbox_manager:
             return PatchResult(success=False, error="No sandbox manager available", files_modified=[])
 
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".diff", delete=False) as f:
-            f.write(diff_content)
-            diff_path = Path(f.name)
-
         try:
-            success = self.sandbox_manager.copy_files_to_sandbox(sandbox_id, diff_path, "/tmp/patch.diff")
-            if not success:
-                return PatchResult(
-                    success=False,
-                    error="Failed to copy patch to sandbox",
-                    files_modified=[],
-                )
-
-            result = self.sandbox_manager.execute_in_sandbox(
-                sandbox_id,
-                ["git", "apply", "--check", "/tmp/patch.diff"],
-            )
-
-            if not result.success:
-                return PatchResult(
-                    success=False,
-                    error=f"Patch would not apply cleanly: {result.stderr}",
-                    sandbox_id=sandbox_id,
-                    files_modified=[],
-                )
-
             result = self.sandbox_manager.execute_in_sandbox(
                 sandbox_id,
-                ["git", "apply", "/tmp/patch.diff"],
+                ["git", "apply", "-"],
+                stdin=diff_content,
             )
 
             if not result.success:
@@ -247,11 +196,10 @@ class PatchApplier:
                     files_modified=[],
                 )
 
-            validation = self.validate_diff(diff_content)
             return PatchResult(
                 success=True,
                 sandbox_id=sandbox_id,
-                files_modified=validation.files_affected,
+                files_modified=files_affected,
             )
 
         except Exception as e:
@@ -260,8 +208,6 @@ class PatchApplier:
                 error=str(e),
                 files_modified=[],
             )
-        finally:
-            diff_path.unlink(missing_ok=True)
 
     def revert_patch(self, repo_path: Path, sandbox_id: str | None = None) -> bool:
         if sandbox_id and self.sandbox_manager:
@@ -1,5 +1,5 @@
 from src.scoring.engine import ScoringEngine, ScoringResult, ScoringThresholds, ScoringWeights
-from src.scoring.llm_judge import JudgeScore, LLMJudge
+from src.scoring.llm_judge import JudgeCache, JudgeScore, LLMJudge
 from src.scoring.risk_analyzer import RiskAnalyzer, RiskFactor
 
 __all__ = [
@@ -7,6 +7,7 @@ __all__ = [
     "ScoringResult",
     "ScoringThresholds",
     "ScoringWeights",
+    "JudgeCache",
     "JudgeScore",
     "LLMJudge",
     "RiskAnalyzer",
@@ -3,8 +3,11 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+import unidiff
+
 from src.agent.state import CheckResult, Decision, Scores
 from src.config import settings
+from src.diff import ParsedDiff, parse_diff
 
 
 @dataclass
@@ -24,6 +27,57 @@ class ScoringThresholds:
     risk_reject: float = 0.7
 
 
+@dataclass
+class DiffStats:
+    lines_added: int = 0
+    lines_removed: int = 0
+    complexity_count: int = 0
+
+
+_SENSITIVE_KEYWORD_RE = re.compile("auth|security|payment|secret|credential")
+_DEPENDENCY_FILES = frozenset(
+    {"requirements.txt", "pyproject.toml", "setup.py", "Pipfile", "poetry.lock"}
+)
+_COMPLEXITY_RE = re.compile(r"\b(?:if|elif|for|while|except|with) |\btry:")
+
+
+def _count_complexity(text: str) -> int:
+    return len(_COMPLEXITY_RE.findall(text))
+
+
+def scan_diff(diff_content: str) -> DiffStats:
+    stats = DiffStats()
+
+    for line in diff_content.split("\n"):
+        if line.startswith("+"):
+            if line.startswith("+++"):
+                continue
+            stats.lines_added += 1
+            stats.complexity_count += _count_complexity(line)
+        elif line.startswith("-") and not line.startswith("---"):
+            stats.lines_removed += 1
+
+    return stats
+
+
+def diff_stats(diff_content: str, parsed_diff: ParsedDiff | None = None) -> DiffStats:
+    if parsed_diff is None:
+        try:
+            parsed_diff = parse_diff(diff_content)
+        except unidiff.UnidiffParseError:
+            return scan_diff(diff_content)
+
+    # Fall back to the line scan for hunk-only or otherwise header-less diffs.
+    if not parsed_diff.files:
+        return scan_diff(diff_content)
+
+    return DiffStats(
+        lines_added=parsed_diff.lines_added,
+        lines_removed=parsed_diff.lines_removed,
+        complexity_count=_count_complexity(parsed_diff.added_text),
+    )
+
+
 @dataclass
 class ScoringResult:
     quality_score: float
@@ -42,12 +96,16 @@ class ScoringEngine:
     ):
         self.weights = weights or ScoringWeights()
         self.thresholds = thresholds or ScoringThresholds()
+        self._sensitive_path_re = re.compile(
+            "|".join(re.escape(path.rstrip("/")) for path in settings.sensitive_paths) or r"(?!)"
+        )
 
     def compute_scores(
         self,
         check_results: dict[str, CheckResult],
         diff_content: str | None = None,
         affected_files: list[str] | None = None,
+        parsed_diff: ParsedDiff | None = None,
     ) -> ScoringResult:
         scores = self._compute_check_scores(check_results)
         quality_score = self._compute_quality_score(scores)
@@ -55,7 +113,9 @@ class ScoringEngine:
         risk_flags: list[str] = []
 
         if diff_content and affected_files:
-            risk_score, risk_flags = self._compute_risk_score(diff_content, affected_files, check_results)
+            risk_score, risk_flags = self._compute_risk_score(
+                diff_content, affected_files, check_results, parsed_diff
+            )
 
         gate_failures = self._check_hard_gates(check_results, affected_files)
 
@@ -136,15 +196,17 @@ class ScoringEngine:
         diff_content: str,
         affected_files: list[str],
         check_results: dict[str, CheckResult],
+        parsed_diff: ParsedDiff | None = None,
     ) -> tuple[float, list[str]]:
         flags: list[str] = []
+        stats = diff_stats(diff_content, parsed_diff)
 
-        diff_size_risk = self._compute_diff_size_risk(diff_content, flags)
+        diff_size_risk = self._compute_diff_size_risk(stats, flags)
         sensitive_path_risk = self._compute_sensitive_path_risk(affected_files, flags)
         test_coverage_risk = self._compute_test_coverage_risk(affected_files, check_results, flags)
-        complexity_risk = self._compute_complexity_risk(diff_content, flags)
+        complexity_risk = self._compute_complexity_risk(stats, flags)
         dependency_risk = self._compute_dependency_risk(affected_files, flags)
-        new_code_risk = self._compute_new_code_risk(diff_content, flags)
+        new_code_risk = self._compute_new_code_risk(stats, flags)
 
         combined = (
             diff_size_risk * 0.15
@@ -157,11 +219,8 @@ class ScoringEngine:
 
         return round(combined, 3), flags
 
-    def _compute_diff_size_risk(self, diff_content: str, flags: list[str]) -> float:
-        lines_added = diff_content.count("\n+")
-        lines_removed = diff_content.count("\n-")
-
-        total_lines = lines_added + lines_removed
+    def _compute_diff_size_risk(self, stats: DiffStats, flags: list[str]) -> float:
+        total_lines = stats.lines_added + stats.lines_removed
 
         if total_lines > 500:
             flags.append(f"Large diff: {total_lines} lines changed")
@@ -175,14 +234,15 @@ class ScoringEngine:
 
     def _compute_sensitive_path_risk(self, affected_files: list[str], flags: list[str]) -> float:
         max_risk = 0.0
+        keyword_hit = False
 
         for file_path in affected_files:
-            for sensitive_path in settings.sensitive_paths:
-                if sensitive_path.rstrip("/") in file_path:
-                    flags.append(f"Sensitive file modified: {file_path}")
-                    max_risk = max(max_risk, 0.8)
+            if self._sensitive_path_re.search(file_path):
+                flags.append(f"Sensitive file modified: {file_path}")
+                max_risk = max(max_risk, 0.8)
+            keyword_hit = keyword_hit or _SENSITIVE_KEYWORD_RE.search(file_path) is not None
 
-        if any(kw in " ".join(affected_files) for kw in ["auth", "security", "payment", "secret", "credential"]):
+        if keyword_hit:
             flags.append("Sensitive keywords in file paths")
             max_risk = max(max_risk, 0.9)
 
@@ -203,9 +263,8 @@ class ScoringEngine:
 
         return 0.0
 
-    def _compute_complexity_risk(self, diff_content: str, flags: list[str]) -> float:
-        complexity_keywords = ["if ", "elif ", "for ", "while ", "try:", "except ", "with "]
-        complexity_count = sum(diff_content.count(kw) for kw in complexity_keywords)
+    def _compute_complexity_risk(self, stats: DiffStats, flags: list[str]) -> float:
+        complexity_count = stats.complexity_count
 
         if complexity_count > 20:
             flags.append(f"High complexity change: {complexity_count} control structures")
@@ -215,31 +274,19 @@ class ScoringEngine:
         return 0.0
 
     def _compute_dependency_risk(self, affected_files: list[str], flags: list[str]) -> float:
-        dependency_files = [
-            "requirements.txt",
-            "pyproject.toml",
-            "setup.py",
-            "Pipfile",
-            "poetry.lock",
-        ]
-
         for file_path in affected_files:
-            for dep_file in dependency_files:
-                if dep_file in file_path:
-                    flags.append(f"Dependency file modified: {file_path}")
-                    return 0.7
+            if any(dep_file in file_path for dep_file in _DEPENDENCY_FILES):
+                flags.append(f"Dependency file modified: {file_path}")
+                return 0.7
 
         return 0.0
 
-    def _compute_new_code_risk(self, diff_content: str, flags: list[str]) -> float:
-        added_lines = [line[1:] for line in diff_content.split("\n") if line.startswith("+") and not line.startswith("+++")]
-        modified_lines = [line[1:] for line in diff_content.split("\n") if line.startswith("-") and not line.startswith("---")]
-
-        total_changes = len(added_lines) + len(modified_lines)
+    def _compute_new_code_risk(self, stats: DiffStats, flags: list[str]) -> float:
+        total_changes = stats.lines_added + stats.lines_removed
         if total_changes == 0:
             return 0.0
 
-        new_ratio = len(added_lines) / total_changes
+        new_ratio = stats.lines_added / total_changes
 
         if new_ratio > 0.8:
             flags.append("Mostly new code (low refactor ratio)")
@@ -1,23 +1,101 @@
+import asyncio
+import hashlib
 import json
-from dataclasses import dataclass
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
 from typing import Any
 
 from openai import AsyncOpenAI
 
+from src.agent.tools.llm import get_openai_client
 from src.config import settings
+from src.diff import parse_diff
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JudgeScore:
     code_quality: float
     error_handling: float
     documentation: float
     edge_cases: float
     overall: float
-    concerns: list[str]
+    concerns: tuple[str, ...]
     recommendation: str
 
 
+DELTA_MIN_OVERLAP = 0.8
+MAX_JUDGE_SESSIONS = 256
+GATED_SCORE = 8.0
+
+gate_stats = {"hits": 0, "misses": 0}
+
+_RESPONSE_FORMAT = """Return JSON with this structure:
+{
+    "scores": {
+        "code_quality": <1-10>,
+        "error_handling": <1-10>,
+        "documentation": <1-10>,
+        "edge_cases": <1-10>
+    },
+    "concerns": ["<list of specific concerns>"],
+    "recommendation": "<approve/review/reject>"
+}
+"""
+_JUDGE_PROMPT_PREFIX = "Review this code change for quality and safety.\n\nDiff:\n```\n"
+_JUDGE_PROMPT_DIFF_END = "\n```\n\n"
+_JUDGE_PROMPT_SUFFIX = "\n\n" + _RESPONSE_FORMAT
+
+
+def _diff_blocks(diff: str) -> list[str]:
+    try:
+        patch_set = parse_diff(diff).patch_set
+    except Exception:
+        return []
+    return [
+        f"--- {patched_file.source_file}\n+++ {patched_file.target_file}\n{hunk}"
+        for patched_file in patch_set
+        for hunk in patched_file
+    ]
+
+
+def _block_hash(block: str) -> bytes:
+    return hashlib.blake2b(block.encode(), digest_size=8).digest()
+
+
+class JudgeCache:
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> JudgeScore | None:
+        try:
+            with (self.cache_dir / f"{key}.json").open("rb") as f:
+                data = json.load(f)
+            return JudgeScore(**{**data, "concerns": tuple(data["concerns"])})
+        except (OSError, KeyError, ValueError, TypeError):
+            return None
+
+    def set(self, key: str, score: JudgeScore) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(asdict(score), f)
+            os.replace(tmp_path, self.cache_dir / f"{key}.json")
+        except OSError:
+            pass
+
+
 class LLMJudge:
     SYSTEM_PROMPT = """You are a senior code reviewer evaluating code changes.
 Your role is to provide an objective assessment of code quality, not to make merge decisions.
@@ -28,6 +106,13 @@ Evaluate the changes on:
 3. Documentation quality (1-10)
 4. Potential for bugs or edge cases (1-10)
 
+Provide your scores and concerns in JSON format."""
+
+    DELTA_SYSTEM_PROMPT = """You are a senior code reviewer re-evaluating a code change that has grown.
+You already reviewed the earlier part of the change; its verdict is given.
+Only the newly added hunks are shown. Update the verdict for the whole change,
+keeping earlier concerns that still apply.
+
 Provide your scores and concerns in JSON format."""
 
     def __init__(
@@ -35,40 +120,134 @@ Provide your scores and concerns in JSON format."""
         model: str | None = None,
         api_key: str | None = None,
         base_url: str | None = None,
+        cache_dir: Path | None = None,
+        client: AsyncOpenAI | None = None,
     ):
         self.model = model or settings.llm_model
-        self.client = AsyncOpenAI(
-            api_key=api_key or settings.openai_api_key,
-            base_url=base_url or settings.openai_base_url,
+        self.api_key = api_key or settings.openai_api_key
+        self.base_url = base_url or settings.openai_base_url or None
+        self._client = client
+        if cache_dir is None and settings.chunk_cache_dir:
+            cache_dir = Path(settings.chunk_cache_dir).expanduser() / "judge"
+        self.cache = JudgeCache(cache_dir) if cache_dir is not None else None
+        self._sessions: OrderedDict[str, tuple[list[bytes], JudgeScore]] = OrderedDict()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return self._client or get_openai_client(self.api_key, self.base_url)
+
+    async def judge(
+        self,
+        diff: str,
+        explanation: str | None = None,
+        use_cache: bool = True,
+        session_id: str | None = None,
+    ) -> JudgeScore:
+        prompt = "".join(
+            (
+                _JUDGE_PROMPT_PREFIX,
+                diff,
+                _JUDGE_PROMPT_DIFF_END,
+                "Context: " + explanation if explanation else "",
+                _JUDGE_PROMPT_SUFFIX,
+            )
         )
 
-    async def judge(self, diff: str, explanation: str | None = None) -> JudgeScore:
-        prompt = f"""Review this code change for quality and safety.
+        cache = self.cache if use_cache else None
+        cache_key = JudgeCache.key(self.model, self.SYSTEM_PROMPT, prompt)
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                self._remember_session(session_id, diff, cached)
+                return cached
+
+        score, parsed = None, False
+        previous = self._sessions.get(session_id) if session_id else None
+        if previous is not None:
+            new_blocks = self._new_tail_blocks(previous[0], _diff_blocks(diff))
+            if new_blocks:
+                score, parsed = await self._judge_delta(new_blocks, previous[1], explanation)
+        if score is None:
+            score, parsed = await self._complete(self.SYSTEM_PROMPT, prompt)
+
+        # A fallback score from an unparseable response is never cached, so the next call retries.
+        if cache is not None and parsed:
+            await asyncio.to_thread(cache.set, cache_key, score)
+        self._remember_session(session_id, diff, score)
+        return score
+
+    async def judge_gated(
+        self,
+        diff: str,
+        explanation: str | None,
+        risk_result: dict[str, Any],
+        use_cache: bool = True,
+    ) -> JudgeScore:
+        # A clearly low-risk change with no flags does not need the model's opinion.
+        if (
+            risk_result["combined_score"] < settings.judge_gate_risk_threshold
+            and not risk_result["flags"]
+        ):
+            gate_stats["hits"] += 1
+            return JudgeScore(
+                code_quality=GATED_SCORE,
+                error_handling=GATED_SCORE,
+                documentation=GATED_SCORE,
+                edge_cases=GATED_SCORE,
+                overall=GATED_SCORE,
+                concerns=(),
+                recommendation="approve",
+            )
+
+        gate_stats["misses"] += 1
+        return await self.judge(diff, explanation, use_cache=use_cache)
+
+    async def judge_many(
+        self, items: list[tuple[str, str | None]], use_cache: bool = True
+    ) -> list[JudgeScore]:
+        semaphore = asyncio.Semaphore(settings.max_concurrent_llm)
+
+        async def _judge(diff: str, explanation: str | None) -> JudgeScore:
+            async with semaphore:
+                return await self.judge(diff, explanation, use_cache=use_cache)
+
+        return await asyncio.gather(*(_judge(diff, explanation) for diff, explanation in items))
+
+    async def _judge_delta(
+        self, new_blocks: list[str], previous: JudgeScore, explanation: str | None
+    ) -> tuple[JudgeScore, bool]:
+        previous_verdict = json.dumps(
+            {
+                "scores": {
+                    "code_quality": previous.code_quality,
+                    "error_handling": previous.error_handling,
+                    "documentation": previous.documentation,
+                    "edge_cases": previous.edge_cases,
+                },
+                "concerns": previous.concerns,
+                "recommendation": previous.recommendation,
+            }
+        )
+        new_hunks = "\n".join(new_blocks)
+        prompt = f"""Previous verdict for the earlier part of this change:
+{previous_verdict}
 
-Diff:
+New hunks appended to the change:
 ```
-{diff}
+{new_hunks}
 ```
 
 {"Context: " + explanation if explanation else ""}
 
-Return JSON with this structure:
-{{
-    "scores": {{
-        "code_quality": <1-10>,
-        "error_handling": <1-10>,
-        "documentation": <1-10>,
-        "edge_cases": <1-10>
-    }},
-    "concerns": ["<list of specific concerns>"],
-    "recommendation": "<approve/review/reject>"
-}}
-"""
+Give the verdict for the whole change, including the new hunks.
+{_RESPONSE_FORMAT}"""
+        return await self._complete(self.DELTA_SYSTEM_PROMPT, prompt)
 
+    async def _complete(self, system_prompt: str, prompt: str) -> tuple[JudgeScore, bool]:
         response = await self.client.chat.completions.create(
             model=self.model,
             messages=[
-                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ],
             temperature=0.0,
@@ -76,10 +255,30 @@ Return JSON with this structure:
             response_format={"type": "json_object"},
         )
 
-        content = response.choices[0].message.content
-        return self._parse_response(content)
+        return self._parse_response(response.choices[0].message.content)
+
+    @staticmethod
+    def _new_tail_blocks(previous_hashes: list[bytes], blocks: list[str]) -> list[str] | None:
+        # Only a pure extension qualifies: every earlier block unchanged and in place,
+        # with the new blocks appended after them and making up a small part of the diff.
+        hashes = [_block_hash(block) for block in blocks]
+        matched = len(previous_hashes)
+        if not matched or len(hashes) <= matched or hashes[:matched] != previous_hashes:
+            return None
+        if matched / len(hashes) < DELTA_MIN_OVERLAP:
+            return None
+        return blocks[matched:]
+
+    def _remember_session(self, session_id: str | None, diff: str, score: JudgeScore) -> None:
+        if not session_id:
+            return
+        hashes = [_block_hash(block) for block in _diff_blocks(diff)]
+        self._sessions[session_id] = (hashes, score)
+        self._sessions.move_to_end(session_id)
+        if len(self._sessions) > MAX_JUDGE_SESSIONS:
+            self._sessions.popitem(last=False)
 
-    def _parse_response(self, content: str | None) -> JudgeScore:
+    def _parse_response(self, content: str | None) -> tuple[JudgeScore, bool]:
         if not content:
             return JudgeScore(
                 code_quality=5.0,
@@ -87,9 +286,9 @@ Return JSON with this structure:
                 documentation=5.0,
                 edge_cases=5.0,
                 overall=5.0,
-                concerns=["Unable to parse LLM response"],
+                concerns=("Unable to parse LLM response",),
                 recommendation="review",
-            )
+            ), False
 
         try:
             data = json.loads(content)
@@ -101,6 +300,9 @@ Return JSON with this structure:
             edge_cases = float(scores.get("edge_cases", 5))
 
             overall = (code_quality + error_handling + documentation + edge_cases) / 4
+            concerns = data.get("concerns", ())
+            if isinstance(concerns, str):
+                concerns = (concerns,)
 
             return JudgeScore(
                 code_quality=code_quality,
@@ -108,9 +310,9 @@ Return JSON with this structure:
                 documentation=documentation,
                 edge_cases=edge_cases,
                 overall=overall,
-                concerns=data.get("concerns", []),
+                concerns=tuple(concerns),
                 recommendation=data.get("recommendation", "review"),
-            )
+            ), True
         except (json.JSONDecodeError, ValueError) as e:
             return JudgeScore(
                 code_quality=5.0,
@@ -118,6 +320,6 @@ Return JSON with this structure:
                 documentation=5.0,
                 edge_cases=5.0,
                 overall=5.0,
-                concerns=[f"Parse error: {str(e)}"],
+                concerns=(f"Parse error: {str(e)}",),
                 recommendation="review",
-            )
+            ), False
@@ -1,11 +1,20 @@
+import copy
+import hashlib
+import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 from src.config import settings
+from src.scoring.engine import diff_stats
 
+_CONTROL_STRUCTURE_RE = re.compile(
+    r"\b(?:if|elif|for|while|except|with|match|case) |\b(?:else|try|finally):"
+)
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class RiskFactor:
     name: str
     weight: float
@@ -14,15 +23,69 @@ class RiskFactor:
     flags: list[str]
 
 
+MAX_CACHED_ANALYSES = 128
+
+_SENSITIVE_KEYWORD_RE = re.compile(
+    "auth|login|password|secret|key|token|credential|payment|billing|config"
+)
+_DEPENDENCY_FILE_RISK = {
+    "requirements.txt": 0.8,
+    "pyproject.toml": 0.8,
+    "setup.py": 0.8,
+    "Pipfile": 0.8,
+    "poetry.lock": 0.9,
+    "Pipfile.lock": 0.9,
+}
+
+
 class RiskAnalyzer:
     def __init__(self, sensitive_paths: list[str] | None = None):
         self.sensitive_paths = sensitive_paths or settings.sensitive_paths
+        self._sensitive_path_re = re.compile(
+            "|".join(re.escape(path.lower().rstrip("/")) for path in self.sensitive_paths)
+            or r"(?!)"
+        )
+        self._results: OrderedDict[bytes, dict[str, Any]] = OrderedDict()
 
     def analyze(
         self,
         diff_content: str,
         affected_files: list[str],
         check_results: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        # check_results is opaque, so only analyses without it are memoized.
+        if check_results is not None:
+            return self._analyze(diff_content, affected_files, check_results)
+
+        key = self._cache_key(diff_content, affected_files)
+        cached = self._results.get(key)
+        if cached is None:
+            cached = self._analyze(diff_content, affected_files, None)
+            self._results[key] = cached
+            if len(self._results) > MAX_CACHED_ANALYSES:
+                self._results.popitem(last=False)
+        else:
+            self._results.move_to_end(key)
+        return copy.deepcopy(cached)
+
+    @staticmethod
+    def _cache_key(diff_content: str, affected_files: list[str]) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (
+            str(settings.scoring_risk_threshold_review),
+            str(settings.scoring_risk_threshold_reject),
+            diff_content,
+            *affected_files,
+        ):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.digest()
+
+    def _analyze(
+        self,
+        diff_content: str,
+        affected_files: list[str],
+        check_results: dict[str, Any] | None,
     ) -> dict[str, Any]:
         factors: list[RiskFactor] = []
 
@@ -66,10 +129,8 @@ class RiskAnalyzer:
         }
 
     def _analyze_diff_size(self, diff_content: str) -> RiskFactor:
-        lines = diff_content.split("\n")
-        added = sum(1 for l in lines if l.startswith("+") and not l.startswith("+++"))
-        removed = sum(1 for l in lines if l.startswith("-") and not l.startswith("---"))
-        total = added + removed
+        stats = diff_stats(diff_content)
+        total = stats.lines_added + stats.lines_removed
 
         flags: list[str] = []
         value = 0.0
@@ -100,30 +161,13 @@ class RiskAnalyzer:
         for file_path in affected_files:
             file_lower = file_path.lower()
 
-            for sensitive_path in self.sensitive_paths:
-                sensitive_lower = sensitive_path.lower().rstrip("/")
-                if sensitive_lower in file_lower:
-                    risk = 0.9
-                    flags.append(f"Sensitive path: {file_path}")
-                    max_risk = max(max_risk, risk)
-
-            sensitive_keywords = [
-                "auth",
-                "login",
-                "password",
-                "secret",
-                "key",
-                "token",
-                "credential",
-                "payment",
-                "billing",
-                "config",
-            ]
-            for keyword in sensitive_keywords:
-                if keyword in file_lower:
-                    risk = 0.6
-                    flags.append(f"Sensitive keyword in path: {file_path}")
-                    max_risk = max(max_risk, risk)
+            if self._sensitive_path_re.search(file_lower):
+                flags.append(f"Sensitive path: {file_path}")
+                max_risk = max(max_risk, 0.9)
+
+            if _SENSITIVE_KEYWORD_RE.search(file_lower):
+                flags.append(f"Sensitive keyword in path: {file_path}")
+                max_risk = max(max_risk, 0.6)
 
         return RiskFactor(
             name="sensitive_paths",
@@ -134,21 +178,7 @@ class RiskAnalyzer:
         )
 
     def _analyze_complexity(self, diff_content: str) -> RiskFactor:
-        control_structures = [
-            "if ",
-            "elif ",
-            "else:",
-            "for ",
-            "while ",
-            "try:",
-            "except ",
-            "finally:",
-            "with ",
-            "match ",
-            "case ",
-        ]
-
-        count = sum(diff_content.count(s) for s in control_structures)
+        count = len(_CONTROL_STRUCTURE_RE.findall(diff_content))
 
         flags: list[str] = []
         value = 0.0
@@ -173,22 +203,13 @@ class RiskAnalyzer:
         )
 
     def _analyze_dependencies(self, affected_files: list[str]) -> RiskFactor:
-        dependency_files = {
-            "requirements.txt": 0.8,
-            "pyproject.toml": 0.8,
-            "setup.py": 0.8,
-            "Pipfile": 0.8,
-            "poetry.lock": 0.9,
-            "Pipfile.lock": 0.9,
-        }
-
         flags: list[str] = []
         max_risk = 0.0
 
         for file_path in affected_files:
             file_name = Path(file_path).name
-            if file_name in dependency_files:
-                risk = dependency_files[file_name]
+            risk = _DEPENDENCY_FILE_RISK.get(file_name)
+            if risk is not None:
                 flags.append(f"Dependency file changed: {file_name}")
                 max_risk = max(max_risk, risk)
 
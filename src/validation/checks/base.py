@@ -1,13 +1,104 @@
 import asyncio
-import subprocess
+import os
+import re
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+import orjson
+
 from src.agent.state import CheckDetail, CheckResult
 
+_MYPY_LINE_RE = re.compile(
+    r"^(?P<file>[^:\n]+):(?:(?P<line>\d+):)?(?:(?P<column>\d+):)?\s*(?P<severity>error|warning):"
+    r"\s*(?P<message>.*?(?:\s\[(?P<rule>[^\]\s]+)\])?)\s*$"
+)
+_PYTEST_OUTCOME_RE = re.compile(r"(?=tests/|.*::).*?(FAILED|ERROR)")
+_PYTEST_SUMMARY_RE = re.compile(r"[= ]*\d+ (?:failed|passed)\b")
+_PYTEST_FAILED_COUNT_RE = re.compile(r"(\d+) (?:failed|errors?)\b")
+_PIPE_READ_SIZE = 64 * 1024
+
+
+async def _read_lines(stream: asyncio.StreamReader, line_handler: Callable[[str], None]) -> bytes:
+    # Hands each line to the parser while the command is still running.
+    chunks: list[bytes] = []
+    pending = b""
+    while chunk := await stream.read(_PIPE_READ_SIZE):
+        chunks.append(chunk)
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            line_handler(line.decode("utf-8", errors="replace"))
+    if pending:
+        line_handler(pending.decode("utf-8", errors="replace"))
+    return b"".join(chunks)
+
+
+class _OutputParser(ABC):
+    def __init__(self) -> None:
+        self.error_count = 0
+        self.warning_count = 0
+        self.details: list[CheckDetail] = []
+
+    @abstractmethod
+    def feed(self, line: str) -> None:
+        pass
+
+    def feed_text(self, text: str) -> None:
+        for line in text.split("\n"):
+            self.feed(line)
+
+    def result(self) -> tuple[int, int, list[CheckDetail]]:
+        return self.error_count, self.warning_count, self.details
+
+
+class _PytestOutputParser(_OutputParser):
+    def feed(self, line: str) -> None:
+        outcome = _PYTEST_OUTCOME_RE.match(line)
+        if outcome is not None:
+            self.error_count += 1
+            if outcome[1] == "FAILED":
+                location = line.split("::", 1)[0].split()
+                self.details.append(
+                    CheckDetail(
+                        file_path=location[-1] if location else "",
+                        line=0,
+                        column=0,
+                        severity="error",
+                        message=line.strip(),
+                        rule_id="test_failure",
+                    )
+                )
+        elif _PYTEST_SUMMARY_RE.match(line):
+            self.error_count = sum(int(n) for n in _PYTEST_FAILED_COUNT_RE.findall(line))
+
+
+class _MypyOutputParser(_OutputParser):
+    def feed(self, line: str) -> None:
+        match = _MYPY_LINE_RE.match(line)
+        if match is None:
+            return
+
+        severity = match["severity"]
+        if severity == "error":
+            self.error_count += 1
+        else:
+            self.warning_count += 1
+
+        self.details.append(
+            CheckDetail(
+                file_path=match["file"],
+                line=int(match["line"] or 0),
+                column=int(match["column"] or 0),
+                severity=severity,
+                message=match["message"],
+                rule_id=match["rule"] or "mypy",
+            )
+        )
+
 
 @dataclass
 class CheckConfig:
@@ -24,46 +115,83 @@ class BaseCheck(ABC):
     async def execute(self, sandbox_id: str | None = None, cwd: str | None = None) -> CheckResult:
         pass
 
-    def _run_command(
+    async def _run_command(
         self,
         command: list[str],
         cwd: str | None = None,
         timeout: int | None = None,
         env: dict[str, str] | None = None,
+        line_handler: Callable[[str], None] | None = None,
     ) -> tuple[int, str, str]:
         timeout = timeout or self.timeout_seconds
         cwd = cwd or "."
 
-        merged_env = subprocess.os.environ.copy()
+        merged_env = os.environ.copy()
         if env:
             merged_env.update(env)
 
         try:
-            result = subprocess.run(
-                command,
+            process = await asyncio.create_subprocess_exec(
+                *command,
                 cwd=cwd,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
                 env=merged_env,
             )
-            return result.returncode, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
+        except Exception as e:
+            return -1, "", str(e)
+
+        if line_handler is None:
+            output = process.communicate()
+        else:
+            output = self._stream_output(process, line_handler)
+
+        try:
+            stdout, stderr = await asyncio.wait_for(output, timeout=timeout)
+        except TimeoutError:
             return -1, "", f"Command timed out after {timeout} seconds"
         except Exception as e:
             return -1, "", str(e)
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await asyncio.shield(process.wait())
+
+        return (
+            process.returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+
+    @staticmethod
+    async def _stream_output(
+        process: asyncio.subprocess.Process, line_handler: Callable[[str], None]
+    ) -> tuple[bytes, bytes]:
+        assert process.stdout is not None and process.stderr is not None
+        stdout, stderr = await asyncio.gather(
+            _read_lines(process.stdout, line_handler), process.stderr.read()
+        )
+        await process.wait()
+        return stdout, stderr
 
 
 class PytestRunner(BaseCheck):
     name = "tests"
     timeout_seconds = 120
 
-    def __init__(self, test_path: str = "tests/", extra_args: list[str] | None = None):
+    def __init__(
+        self,
+        test_path: str = "tests/",
+        extra_args: list[str] | None = None,
+        workers: int | None = None,
+    ):
         self.test_path = test_path
         self.extra_args = extra_args or []
+        # -n needs pytest-xdist in the target environment, so it is only passed when asked for.
+        self.workers = workers
 
     async def execute(self, sandbox_id: str | None = None, cwd: str | None = None) -> CheckResult:
-        start_time = datetime.utcnow()
+        start_ns = time.monotonic_ns()
 
         command = [
             "pytest",
@@ -72,17 +200,22 @@ class PytestRunner(BaseCheck):
             "--tb=short",
             "--no-header",
             "-q",
+            *(["-n", str(self.workers)] if self.workers else []),
             *self.extra_args,
         ]
 
-        returncode, stdout, stderr = self._run_command(command, cwd=cwd, timeout=self.timeout_seconds)
+        parser = _PytestOutputParser()
+        returncode, stdout, stderr = await self._run_command(
+            command, cwd=cwd, timeout=self.timeout_seconds, line_handler=parser.feed
+        )
+        parser.feed_text(stderr)
 
         output = f"{stdout}\n{stderr}".strip()
         passed = returncode == 0
 
-        error_count, warning_count, details = self._parse_output(output)
+        error_count, warning_count, details = parser.result()
 
-        duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
 
         return CheckResult(
             check_name=self.name,
@@ -97,52 +230,9 @@ class PytestRunner(BaseCheck):
         )
 
     def _parse_output(self, output: str) -> tuple[int, int, list[CheckDetail]]:
-        details: list[CheckDetail] = []
-        error_count = 0
-        warning_count = 0
-
-        lines = output.split("\n")
-        current_file = ""
-
-        for line in lines:
-            if line.startswith("tests/") or "::" in line:
-                if "FAILED" in line:
-                    error_count += 1
-                    parts = line.split("::")
-                    if parts:
-                        file_part = parts[0].strip()
-                        if " " in file_part:
-                            file_part = file_part.split()[0]
-                        details.append(
-                            CheckDetail(
-                                file_path=file_part,
-                                line=0,
-                                column=0,
-                                severity="error",
-                                message=line.strip(),
-                                rule_id="test_failure",
-                            )
-                        )
-                elif "ERROR" in line:
-                    error_count += 1
-
-            if " passed" in line or " failed" in line:
-                pass_count = 0
-                fail_count = 0
-                for part in line.split():
-                    if "passed" in part:
-                        try:
-                            pass_count = int(part.replace("passed", ""))
-                        except ValueError:
-                            pass
-                    if "failed" in part:
-                        try:
-                            fail_count = int(part.replace("failed", ""))
-                        except ValueError:
-                            pass
-                error_count = fail_count
-
-        return error_count, warning_count, details
+        parser = _PytestOutputParser()
+        parser.feed_text(output)
+        return parser.result()
 
 
 class RuffRunner(BaseCheck):
@@ -154,18 +244,20 @@ class RuffRunner(BaseCheck):
         self.extra_args = extra_args or []
 
     async def execute(self, sandbox_id: str | None = None, cwd: str | None = None) -> CheckResult:
-        start_time = datetime.utcnow()
+        start_ns = time.monotonic_ns()
 
         command = ["ruff", "check", self.target_path, "--output-format=json", *self.extra_args]
 
-        returncode, stdout, stderr = self._run_command(command, cwd=cwd, timeout=self.timeout_seconds)
+        returncode, stdout, stderr = await self._run_command(
+            command, cwd=cwd, timeout=self.timeout_seconds
+        )
 
         output = f"{stdout}\n{stderr}".strip()
         passed = returncode == 0
 
         error_count, warning_count, details = self._parse_output(stdout)
 
-        duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
 
         return CheckResult(
             check_name=self.name,
@@ -180,14 +272,12 @@ class RuffRunner(BaseCheck):
         )
 
     def _parse_output(self, output: str) -> tuple[int, int, list[CheckDetail]]:
-        import json
-
         details: list[CheckDetail] = []
         error_count = 0
         warning_count = 0
 
         try:
-            results = json.loads(output) if output.strip() else []
+            results = orjson.loads(output) if output.strip() else []
             for item in results:
                 severity = "error" if item.get("fix", None) is not None else "warning"
                 if severity == "error":
@@ -205,7 +295,7 @@ class RuffRunner(BaseCheck):
                         rule_id=item.get("code", ""),
                     )
                 )
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             if "error" in output.lower():
                 error_count = 1
                 details.append(
@@ -230,11 +320,13 @@ class RuffFormatRunner(BaseCheck):
         self.target_path = target_path
 
     async def execute(self, sandbox_id: str | None = None, cwd: str | None = None) -> CheckResult:
-        start_time = datetime.utcnow()
+        start_ns = time.monotonic_ns()
 
         command = ["ruff", "format", "--check", self.target_path]
 
-        returncode, stdout, stderr = self._run_command(command, cwd=cwd, timeout=self.timeout_seconds)
+        returncode, stdout, stderr = await self._run_command(
+            command, cwd=cwd, timeout=self.timeout_seconds
+        )
 
         output = f"{stdout}\n{stderr}".strip()
         passed = returncode == 0
@@ -258,7 +350,7 @@ class RuffFormatRunner(BaseCheck):
                         )
                     )
 
-        duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
 
         return CheckResult(
             check_name=self.name,
@@ -279,21 +371,25 @@ class MypyRunner(BaseCheck):
 
     def __init__(self, target_path: str = "src/", extra_args: list[str] | None = None):
         self.target_path = target_path
-        self.extra_args = extra_args or ["--no-error-summary"]
+        self.extra_args = extra_args or ["--no-error-summary", "--fast-module-lookup"]
 
     async def execute(self, sandbox_id: str | None = None, cwd: str | None = None) -> CheckResult:
-        start_time = datetime.utcnow()
+        start_ns = time.monotonic_ns()
 
         command = ["mypy", self.target_path, *self.extra_args]
 
-        returncode, stdout, stderr = self._run_command(command, cwd=cwd, timeout=self.timeout_seconds)
+        parser = _MypyOutputParser()
+        returncode, stdout, stderr = await self._run_command(
+            command, cwd=cwd, timeout=self.timeout_seconds, line_handler=parser.feed
+        )
+        parser.feed_text(stderr)
 
         output = f"{stdout}\n{stderr}".strip()
         passed = returncode == 0
 
-        error_count, warning_count, details = self._parse_output(output)
+        error_count, warning_count, details = parser.result()
 
-        duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
 
         return CheckResult(
             check_name=self.name,
@@ -308,43 +404,9 @@ class MypyRunner(BaseCheck):
         )
 
     def _parse_output(self, output: str) -> tuple[int, int, list[CheckDetail]]:
-        details: list[CheckDetail] = []
-        error_count = 0
-        warning_count = 0
-
-        for line in output.split("\n"):
-            if ": error:" in line:
-                error_count += 1
-                details.append(self._parse_line(line, "error"))
-            elif ": warning:" in line:
-                warning_count += 1
-                details.append(self._parse_line(line, "warning"))
-            elif ": note:" in line:
-                pass
-
-        return error_count, warning_count, details
-
-    def _parse_line(self, line: str, severity: str) -> CheckDetail:
-        parts = line.split(":", 3)
-        file_path = parts[0] if len(parts) > 0 else ""
-        line_num = int(parts[1]) if len(parts) > 1 and parts[1].strip().isdigit() else 0
-        message = parts[3].strip() if len(parts) > 3 else line
-
-        if "[" in message and "]" in message:
-            bracket_start = message.rfind("[")
-            bracket_end = message.rfind("]")
-            rule_id = message[bracket_start + 1 : bracket_end]
-        else:
-            rule_id = "mypy"
-
-        return CheckDetail(
-            file_path=file_path,
-            line=line_num,
-            column=0,
-            severity=severity,
-            message=message,
-            rule_id=rule_id,
-        )
+        parser = _MypyOutputParser()
+        parser.feed_text(output)
+        return parser.result()
 
 
 class SemgrepRunner(BaseCheck):
@@ -353,12 +415,13 @@ class SemgrepRunner(BaseCheck):
 
     SEVERITY_MAP = {"ERROR": "error", "WARNING": "warning", "INFO": "info"}
 
-    def __init__(self, target_path: str = "src/", config: str = "auto"):
+    def __init__(self, target_path: str = "src/", config: str = "auto", jobs: int | None = None):
         self.target_path = target_path
         self.config = config
+        self.jobs = jobs
 
     async def execute(self, sandbox_id: str | None = None, cwd: str | None = None) -> CheckResult:
-        start_time = datetime.utcnow()
+        start_ns = time.monotonic_ns()
 
         command = [
             "semgrep",
@@ -366,17 +429,20 @@ class SemgrepRunner(BaseCheck):
             self.config,
             "--json",
             "--no-git-ignore",
+            *(["--jobs", str(self.jobs)] if self.jobs else []),
             self.target_path,
         ]
 
-        returncode, stdout, stderr = self._run_command(command, cwd=cwd, timeout=self.timeout_seconds)
+        returncode, stdout, stderr = await self._run_command(
+            command, cwd=cwd, timeout=self.timeout_seconds
+        )
 
         output = f"{stdout}\n{stderr}".strip()
         error_count, warning_count, details, has_critical = self._parse_output(stdout)
 
         passed = not has_critical
 
-        duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
 
         return CheckResult(
             check_name=self.name,
@@ -391,20 +457,20 @@ class SemgrepRunner(BaseCheck):
         )
 
     def _parse_output(self, output: str) -> tuple[int, int, list[CheckDetail], bool]:
-        import json
-
         details: list[CheckDetail] = []
         error_count = 0
         warning_count = 0
         has_critical = False
 
         try:
-            data = json.loads(output) if output.strip() else {}
+            data = orjson.loads(output) if output.strip() else {}
             results = data.get("results", [])
 
             for result in results:
-                severity = result.get("extra", {}).get("severity", "INFO")
-                mapped_severity = self.SEVERITY_MAP.get(severity, "info")
+                extra = result.get("extra", {})
+                start = result.get("start", {})
+                check_id = result.get("check_id")
+                mapped_severity = self.SEVERITY_MAP.get(extra.get("severity", "INFO"), "info")
 
                 if mapped_severity == "error":
                     error_count += 1
@@ -415,14 +481,14 @@ class SemgrepRunner(BaseCheck):
                 details.append(
                     CheckDetail(
                         file_path=result.get("path", ""),
-                        line=result.get("start", {}).get("line", 0),
-                        column=result.get("start", {}).get("col", 0),
+                        line=start.get("line", 0),
+                        column=start.get("col", 0),
                         severity=mapped_severity,
-                        message=result.get("extra", {}).get("message", ""),
-                        rule_id=result.get("check_id", "").split(".")[-1] if result.get("check_id") else "semgrep",
+                        message=extra.get("message", ""),
+                        rule_id=check_id.rpartition(".")[2] if check_id else "semgrep",
                     )
                 )
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             pass
 
         return error_count, warning_count, details, has_critical
@@ -1,9 +1,11 @@
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import cached_property
 from typing import Any
 
 from src.agent.state import CheckResult
+from src.config import settings
 from src.validation.checks.base import BaseCheck, MypyRunner, PytestRunner, RuffFormatRunner, RuffRunner, SemgrepRunner
 
 
@@ -21,6 +23,7 @@ class ValidationConfig:
     security_path: str = "src/"
 
     fail_fast: bool = True
+    parallelism: int | None = field(default_factory=lambda: settings.validation_parallelism)
 
 
 class ValidationPipeline:
@@ -41,48 +44,69 @@ class ValidationPipeline:
             self._checks.append(("typecheck", MypyRunner(self.config.typecheck_path)))
 
         if self.config.run_security:
-            self._checks.append(("security", SemgrepRunner(self.config.security_path)))
+            self._checks.append(
+                ("security", SemgrepRunner(self.config.security_path, jobs=self.config.parallelism))
+            )
 
         if self.config.run_tests:
-            self._checks.append(("tests", PytestRunner(self.config.test_path)))
+            self._checks.append(
+                ("tests", PytestRunner(self.config.test_path, workers=self.config.parallelism))
+            )
 
-    async def run(self, sandbox_id: str | None = None, cwd: str | None = None) -> dict[str, CheckResult]:
-        results: dict[str, CheckResult] = {}
-
-        for name, check in self._checks:
-            result = await check.execute(sandbox_id=sandbox_id, cwd=cwd)
-            results[name] = result
-
-            if self.config.fail_fast and result.has_critical_failure:
-                break
+    @cached_property
+    def check_names(self) -> tuple[str, ...]:
+        return tuple(name for name, _ in self._checks)
 
-        return results
+    async def run(self, sandbox_id: str | None = None, cwd: str | None = None) -> dict[str, CheckResult]:
+        return await self._run_checks(sandbox_id, cwd, self.config.fail_fast)
 
     async def run_parallel(
         self, sandbox_id: str | None = None, cwd: str | None = None
     ) -> dict[str, CheckResult]:
-        tasks = [(name, check.execute(sandbox_id=sandbox_id, cwd=cwd)) for name, check in self._checks]
-
-        results: dict[str, CheckResult] = {}
-        completed = await asyncio.gather(*[task for _, task in tasks], return_exceptions=True)
-
-        for (name, _), result in zip(tasks, completed):
-            if isinstance(result, Exception):
-                results[name] = CheckResult(
-                    check_name=name,
-                    passed=False,
-                    output=str(result),
-                    error_count=1,
-                    warning_count=0,
-                    details=[],
-                    duration_ms=0,
-                    timestamp=datetime.utcnow(),
-                    has_critical_failure=True,
-                )
-            else:
-                results[name] = result
-
-        return results
+        return await self._run_checks(sandbox_id, cwd, fail_fast=False)
+
+    async def _run_checks(
+        self, sandbox_id: str | None, cwd: str | None, fail_fast: bool
+    ) -> dict[str, CheckResult]:
+        # The checks only read the tree, so they all run at once; with fail_fast the
+        # first critical failure cancels whatever is still running.
+        tasks = {
+            asyncio.ensure_future(check.execute(sandbox_id=sandbox_id, cwd=cwd)): name
+            for name, check in self._checks
+        }
+
+        completed: dict[str, CheckResult] = {}
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                completed[tasks[task]] = self._task_result(tasks[task], task)
+
+            if fail_fast and any(completed[tasks[task]].has_critical_failure for task in done):
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+
+        return {name: completed[name] for name in self.check_names if name in completed}
+
+    @staticmethod
+    def _task_result(name: str, task: asyncio.Future[CheckResult]) -> CheckResult:
+        error = task.exception()
+        if error is None:
+            return task.result()
+
+        return CheckResult(
+            check_name=name,
+            passed=False,
+            output=str(error),
+            error_count=1,
+            warning_count=0,
+            details=[],
+            duration_ms=0,
+            timestamp=datetime.utcnow(),
+            has_critical_failure=True,
+        )
 
     def get_summary(self, results: dict[str, CheckResult]) -> dict[str, Any]:
         total_passed = sum(1 for r in results.values() if r.passed)
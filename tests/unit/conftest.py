@@ -0,0 +1,25 @@
+import pytest
+
+from src.indexing.chunker import CodeChunker, DocChunker
+from src.scoring.engine import ScoringEngine
+from src.validation.pipeline import ValidationPipeline
+
+
+@pytest.fixture(scope="module")
+def scoring_engine():
+    return ScoringEngine()
+
+
+@pytest.fixture(scope="module")
+def code_chunker():
+    return CodeChunker()
+
+
+@pytest.fixture(scope="module")
+def doc_chunker():
+    return DocChunker()
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return ValidationPipeline()
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from src.db.audit import AuditLogger
+
+
+pytestmark = pytest.mark.unit
+
+
+class StubSession:
+    def __init__(self, store: "StubStore"):
+        self.store = store
+        self.rows: list[dict] = []
+
+    async def __aenter__(self) -> "StubSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    async def execute(self, statement, rows: list[dict]) -> None:
+        self.store.calls += 1
+        if self.store.gate is not None:
+            await self.store.gate.wait()
+        if self.store.calls in self.store.failing_calls:
+            raise ConnectionError("database unavailable")
+        self.rows.extend(rows)
+
+    async def commit(self) -> None:
+        self.store.committed.extend(row["event_type"] for row in self.rows)
+
+
+class StubStore:
+    def __init__(self, *failing_calls: int):
+        self.failing_calls = set(failing_calls)
+        self.calls = 0
+        self.committed: list[str] = []
+        self.gate: asyncio.Event | None = None
+
+    def session(self) -> StubSession:
+        return StubSession(self)
+
+
+def make_logger(store: StubStore, **kwargs) -> AuditLogger:
+    kwargs.setdefault("batch_size", 2)
+    kwargs.setdefault("flush_interval_ms", 60_000)
+    return AuditLogger(session_factory=store.session, **kwargs)
+
+
+async def log_events(audit: AuditLogger, *names: str) -> None:
+    for name in names:
+        await audit.log(run_id="", event_type=name, event_data={})
+
+
+async def test_failed_batch_is_requeued_in_order():
+    store = StubStore(1)
+    audit = make_logger(store)
+    await log_events(audit, "e1", "e2", "e3", "e4", "e5")
+
+    with pytest.raises(ConnectionError):
+        await audit.flush()
+    assert store.committed == []
+
+    await audit.flush()
+    assert store.committed == ["e1", "e2", "e3", "e4", "e5"]
+    await audit.close()
+
+
+async def test_failure_after_partial_flush_keeps_the_rest():
+    store = StubStore(2)
+    audit = make_logger(store)
+    await log_events(audit, "e1", "e2", "e3", "e4", "e5")
+
+    with pytest.raises(ConnectionError):
+        await audit.flush()
+    assert store.committed == ["e1", "e2"]
+
+    await audit.flush()
+    assert store.committed == ["e1", "e2", "e3", "e4", "e5"]
+    await audit.close()
+
+
+async def test_full_buffer_counts_dropped_rows():
+    store = StubStore()
+    audit = make_logger(store, batch_size=100, queue_maxsize=3)
+    await log_events(audit, "e1", "e2", "e3", "e4", "e5")
+
+    assert audit.dropped == 2
+
+    await audit.close()
+    assert store.committed == ["e3", "e4", "e5"]
+
+
+async def test_concurrent_flush_waits_for_rows_being_written():
+    store = StubStore()
+    store.gate = asyncio.Event()
+    audit = make_logger(store)
+    await log_events(audit, "e1", "e2", "e3")
+
+    first = asyncio.create_task(audit.flush())
+    await asyncio.sleep(0)
+    # Rows logged mid-flush land in the other buffer.
+    await log_events(audit, "e4")
+    second = asyncio.create_task(audit.flush())
+    await asyncio.sleep(0)
+    assert not second.done()
+
+    store.gate.set()
+    await asyncio.gather(first, second)
+
+    assert store.committed == ["e1", "e2", "e3", "e4"]
+    await audit.close()
+
+
+async def test_flusher_stops_once_buffers_are_empty():
+    store = StubStore()
+    audit = make_logger(store, flush_interval_ms=1)
+    await log_events(audit, "e1")
+
+    task = audit._flusher_task
+    await asyncio.wait_for(task, timeout=1)
+
+    assert task.done()
+    assert store.committed == ["e1"]
+    assert not audit._buffers[0] and not audit._buffers[1]
+
+
+async def test_flusher_retries_after_failure():
+    store = StubStore(1)
+    audit = make_logger(store, flush_interval_ms=1)
+    await log_events(audit, "e1", "e2")
+
+    await asyncio.wait_for(audit._flusher_task, timeout=1)
+
+    assert store.committed == ["e1", "e2"]
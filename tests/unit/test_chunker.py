@@ -1,11 +1,13 @@
-from src.indexing.chunker import CodeChunker, DocChunker, ChunkMetadata
+import pytest
+
+from src.indexing.chunker import ChunkMetadata
 from pathlib import Path
 
 
-def test_code_chunker_function_extraction():
-    chunker = CodeChunker()
-    
-    code = '''
+pytestmark = pytest.mark.unit
+
+
+HELLO_SRC = '''
 def hello_world(name: str) -> str:
     """Say hello."""
     return f"Hello, {name}!"
@@ -13,23 +15,8 @@ def hello_world(name: str) -> str:
 async def async_func():
     pass
 '''
-    
-    chunks = chunker.chunk_file(Path("test.py"), code)
-    
-    assert len(chunks) >= 2
-    
-    function_chunks = [c for c in chunks if c.chunk_type == "function"]
-    assert len(function_chunks) >= 2
-    
-    hello_chunk = next(c for c in function_chunks if c.symbol_name == "hello_world")
-    assert hello_chunk.docstring == "Say hello."
-    assert "def hello_world" in hello_chunk.content
-
 
-def test_code_chunker_class_extraction():
-    chunker = CodeChunker()
-    
-    code = '''
+USER_SERVICE_SRC = '''
 class UserService:
     """Service for users."""
     
@@ -39,19 +26,40 @@ class UserService:
     def get_user(self, user_id: int):
         return self.db.query(User).get(user_id)
 '''
+
+
+@pytest.fixture(scope="module")
+def hello_chunks(code_chunker):
+    return code_chunker.chunk_file(Path("test.py"), HELLO_SRC)
+
+
+@pytest.fixture(scope="module")
+def user_service_chunks(code_chunker):
+    return code_chunker.chunk_file(Path("service.py"), USER_SERVICE_SRC)
+
+
+def test_code_chunker_function_extraction(hello_chunks):
+    assert len(hello_chunks) >= 2
     
-    chunks = chunker.chunk_file(Path("service.py"), code)
+    function_chunks = [c for c in hello_chunks if c.chunk_type == "function"]
+    assert len(function_chunks) >= 2
     
-    class_chunks = [c for c in chunks if c.chunk_type == "class"]
+    functions_by_name = {c.symbol_name: c for c in function_chunks}
+    hello_chunk = functions_by_name["hello_world"]
+    assert hello_chunk.docstring == "Say hello."
+    assert "def hello_world" in hello_chunk.content
+
+
+def test_code_chunker_class_extraction(user_service_chunks):
+    class_chunks = [c for c in user_service_chunks if c.chunk_type == "class"]
     assert len(class_chunks) >= 1
     
-    us_class = next(c for c in class_chunks if c.symbol_name == "UserService")
+    classes_by_name = {c.symbol_name: c for c in class_chunks}
+    us_class = classes_by_name["UserService"]
     assert us_class.docstring == "Service for users."
 
 
-def test_doc_chunker_markdown():
-    chunker = DocChunker()
-    
+def test_doc_chunker_markdown(doc_chunker):
     doc = '''# Introduction
 
 This is the introduction.
@@ -65,7 +73,7 @@ Follow these steps.
 Here's the API.
 '''
     
-    chunks = chunker.chunk_file(Path("README.md"), doc)
+    chunks = doc_chunker.chunk_file(Path("README.md"), doc)
     
     assert len(chunks) >= 1
     assert all(c.language == "markdown" for c in chunks)
@@ -0,0 +1,67 @@
+import pytest
+
+from src.agent.tools.diff_generator import DiffGenerator
+
+
+pytestmark = pytest.mark.unit
+
+
+DIFF = "--- a/x.py\n+++ b/x.py\n@@ -1,2 +1,2 @@\n a = 1\n-b = 2\n+b = 3"
+
+RESPONSES = {
+    "fenced": f"Here is the change:\n```\n{DIFF}\n```\nLet me know if it needs more.",
+    "unfenced": f"Sure, this renames nothing.\n\n{DIFF}\n\n",
+    "diff_fence_tag": f"```diff\n{DIFF}\n```\nThat bumps b.",
+    "malformed_hunk_header": DIFF.replace("@@ -1,2 +1,2 @@", "@@ -1,5 +1,9 @@"),
+}
+
+
+class StubLLM:
+    def __init__(self, response: str, token_size: int = 1):
+        self.response = response
+        self.token_size = token_size
+
+    async def generate(self, **kwargs) -> str:
+        return self.response
+
+    async def stream(self, **kwargs):
+        for start in range(0, len(self.response), self.token_size):
+            yield self.response[start : start + self.token_size]
+
+
+async def generate_both(response: str, token_size: int) -> tuple[str, str]:
+    # Separate generators so neither result is served from the other's cache.
+    whole = await DiffGenerator(llm=StubLLM(response)).generate_diff("x.py", "a = 1\nb = 2\n", "bump b")
+    streamed = [
+        line
+        async for line in DiffGenerator(llm=StubLLM(response, token_size)).generate_diff_stream(
+            "x.py", "a = 1\nb = 2\n", "bump b"
+        )
+    ]
+    return whole, "\n".join(streamed)
+
+
+@pytest.mark.parametrize("token_size", [1, 3, 7])
+@pytest.mark.parametrize("case", list(RESPONSES))
+async def test_stream_matches_whole_response(case, token_size):
+    whole, streamed = await generate_both(RESPONSES[case], token_size)
+
+    assert streamed == whole
+    assert whole == DIFF
+
+
+async def test_malformed_hunk_header_is_recounted_before_release():
+    generator = DiffGenerator(llm=StubLLM(RESPONSES["malformed_hunk_header"]))
+
+    lines = [line async for line in generator.generate_diff_stream("x.py", "", "bump b")]
+
+    assert "@@ -1,2 +1,2 @@" in lines
+    assert "@@ -1,5 +1,9 @@" not in lines
+
+
+async def test_response_without_diff_is_taken_whole():
+    response = "  I could not find anything to change.\n"
+
+    whole, streamed = await generate_both(response, 2)
+
+    assert streamed == whole == "I could not find anything to change."
@@ -0,0 +1,72 @@
+import pytest
+
+from src.agent.nodes.generate_patch import _count_changed_lines
+
+
+pytestmark = pytest.mark.unit
+
+
+def startswith_count(diff: str) -> int:
+    # The count generate_patch used before hunk bodies were walked by their header counts.
+    return sum(1 for line in diff.split("\n") if line[:1] in "+-" and not line.startswith(("+++ ", "--- ")))
+
+
+HEADERS_ONLY_SKIPPED = """\
+--- a/x.py
++++ b/x.py
+@@ -1,3 +1,3 @@
+ a = 1
+-b = 2
++b = 3
+ c = 4"""
+
+OMITTED_COUNTS = """\
+--- a/x.py
++++ b/x.py
+@@ -1 +1 @@
+-a = 1
++a = 2"""
+
+SEVERAL_FILES = """\
+diff --git a/x.py b/x.py
+--- a/x.py
++++ b/x.py
+@@ -1,2 +1,3 @@
+ a = 1
++b = 2
++c = 3
+diff --git a/y.py b/y.py
+--- a/y.py
++++ b/y.py
+@@ -1,2 +1,1 @@
+-x = 1
+ y = 2
+\\ No newline at end of file
+diff --git a/z.py b/z.py
+new file mode 100644
+--- /dev/null
++++ b/z.py
+@@ -0,0 +1,1 @@
++z = 1"""
+
+
+@pytest.mark.parametrize(
+    "diff, expected",
+    [(HEADERS_ONLY_SKIPPED, 2), (OMITTED_COUNTS, 2), (SEVERAL_FILES, 4)],
+)
+def test_count_matches_startswith_count(diff, expected):
+    assert _count_changed_lines(diff) == expected
+    assert startswith_count(diff) == expected
+
+
+def test_dashed_content_lines_inside_hunk_are_counted():
+    # Removing "-- a" and adding "++ b" look like file headers once prefixed.
+    diff = "--- a/x.sql\n+++ b/x.sql\n@@ -1,2 +1,2 @@\n--- a\n+++ b\n select 1;"
+
+    assert _count_changed_lines(diff) == 2
+    assert startswith_count(diff) == 0
+
+
+def test_no_hunks_counts_nothing():
+    assert _count_changed_lines("--- a/x.py\n+++ b/x.py") == 0
+    assert _count_changed_lines("") == 0
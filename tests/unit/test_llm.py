@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from src.agent.nodes.explain_diff import explain_diff
+from src.agent.state import AgentState, TaskType
+from src.agent.tools import llm as llm_module
+from src.agent.tools.llm import LLMClient
+
+
+pytestmark = pytest.mark.unit
+
+
+class FakeSemanticCache:
+    def __init__(self, response: str | None = None):
+        self.response = response
+        self.lookups: list[str] = []
+        self.stored: list[str] = []
+
+    async def lookup(self, model: str, text: str) -> tuple[str | None, list[float] | None]:
+        self.lookups.append(text)
+        return self.response, [0.1, 0.2]
+
+    async def store(self, model: str, text: str, embedding: list[float], response: str) -> None:
+        self.stored.append(response)
+
+
+class FakeCompletions:
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    completions = FakeCompletions("fresh response")
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(LLMClient, "client", property(lambda self: client))
+    monkeypatch.setattr(llm_module, "_response_cache", OrderedDict())
+    return completions
+
+
+async def test_generate_skips_semantic_cache_by_default(completions):
+    semantic = FakeSemanticCache("near match")
+    client = LLMClient(semantic_cache=semantic)
+
+    response = await client.generate("prompt", temperature=0.0)
+
+    assert response == "fresh response"
+    assert semantic.lookups == []
+    assert completions.calls == 1
+
+
+async def test_generate_returns_semantic_hit_when_opted_in(completions):
+    semantic = FakeSemanticCache("near match")
+    client = LLMClient(semantic_cache=semantic)
+
+    response = await client.generate("prompt", temperature=0.0, semantic_cache=True)
+
+    assert response == "near match"
+    assert completions.calls == 0
+
+
+async def test_generate_stores_semantic_miss(completions):
+    semantic = FakeSemanticCache()
+    client = LLMClient(semantic_cache=semantic)
+
+    response = await client.generate("prompt", temperature=0.0, semantic_cache=True)
+
+    assert response == "fresh response"
+    assert semantic.stored == ["fresh response"]
+
+
+async def test_explain_diff_opts_into_semantic_cache(completions):
+    semantic = FakeSemanticCache("cached explanation")
+    state = AgentState(
+        run_id="run-1",
+        repo_path="/tmp/repo",
+        task_type=TaskType.REFACTOR,
+        task_description="Rename a variable",
+        generated_diff="--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a = 1\n+b = 1",
+    )
+
+    state = await explain_diff(state, llm=LLMClient(semantic_cache=semantic))
+
+    assert state.explanation == "cached explanation"
+    assert len(semantic.lookups) == 1
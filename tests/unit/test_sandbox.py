@@ -0,0 +1,200 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from src.sandbox.docker_manager import _FRAME_HEADER, DockerSandboxManager, _SandboxShell
+
+
+pytestmark = pytest.mark.unit
+
+
+_TOKEN_RE = re.compile(rb"__sandbox_done_[0-9a-f]+__")
+
+
+def frame(stream: int, payload: bytes) -> bytes:
+    return _FRAME_HEADER.pack(stream, len(payload)) + payload
+
+
+class FakeSocket:
+    """Replays Docker-multiplexed frames built from the marker in the script it is sent."""
+
+    def __init__(self, respond=None, chunk_size: int = 4096, hang: bool = False):
+        self.respond = respond
+        self.chunk_size = chunk_size
+        self.hang = hang
+        self.sent = b""
+        self.pending = b""
+        self.closed = False
+        self.write_closed = False
+
+    def settimeout(self, timeout: float) -> None:
+        pass
+
+    def sendall(self, data: bytes) -> None:
+        self.sent += data
+        if self.respond is not None:
+            self.pending += self.respond(_TOKEN_RE.search(self.sent).group())
+
+    def shutdown(self, how: int) -> None:
+        self.write_closed = True
+
+    def recv(self, size: int) -> bytes:
+        if not self.pending:
+            if self.hang:
+                raise TimeoutError
+            return b""
+        size = min(size, self.chunk_size)
+        chunk, self.pending = self.pending[:size], self.pending[size:]
+        return chunk
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def finished(stdout: bytes, stderr: bytes = b"", exit_code: int = 0):
+    def respond(token: bytes) -> bytes:
+        return frame(1, stdout + b"\n" + token + str(exit_code).encode() + b"\n") + frame(
+            2, stderr + b"\n" + token + b"\n"
+        )
+
+    return respond
+
+
+def test_shell_marker_split_across_frames():
+    def respond(token: bytes) -> bytes:
+        tail = b"\n" + token + b"3\n"
+        return (
+            frame(1, b"out\n" + tail[:8])
+            + frame(1, tail[8:])
+            + frame(2, b"\n" + token[:5])
+            + frame(2, token[5:] + b"\n")
+        )
+
+    shell = _SandboxShell(FakeSocket(respond, chunk_size=3))
+
+    assert shell.run(["true"], "/repo", timeout=5) == (3, b"out\n", b"")
+
+
+def test_shell_stderr_before_stdout():
+    def respond(token: bytes) -> bytes:
+        return frame(2, b"warn\n\n" + token + b"\n") + frame(1, b"out\n" + token + b"1\n")
+
+    shell = _SandboxShell(FakeSocket(respond))
+
+    assert shell.run(["true"], "/repo", timeout=5) == (1, b"out", b"warn\n")
+
+
+def test_shell_output_without_trailing_newline():
+    shell = _SandboxShell(FakeSocket(finished(b"no newline", b"err")))
+
+    assert shell.run(["true"], "/repo", timeout=5) == (0, b"no newline", b"err")
+
+
+def test_shell_eof_mid_command_raises_connection_error():
+    def respond(token: bytes) -> bytes:
+        return frame(1, b"partial output")
+
+    shell = _SandboxShell(FakeSocket(respond))
+
+    with pytest.raises(ConnectionError):
+        shell.run(["true"], "/repo", timeout=5)
+
+
+def test_shell_timeout_raises():
+    shell = _SandboxShell(FakeSocket(hang=True))
+
+    with pytest.raises(TimeoutError):
+        shell.run(["sleep", "10"], "/repo", timeout=5)
+
+
+@pytest.mark.parametrize("stdin", [None, ""])
+def test_shell_without_stdin_reads_dev_null(stdin):
+    sock = FakeSocket(finished(b""))
+
+    _SandboxShell(sock).run(["git", "apply"], "/repo", timeout=5, stdin=stdin)
+
+    assert b"</dev/null" in sock.sent
+    assert b"<<" not in sock.sent
+
+
+def test_shell_passes_stdin_as_heredoc():
+    sock = FakeSocket(finished(b""))
+
+    _SandboxShell(sock).run(["git", "apply"], "/repo", timeout=5, stdin="--- a/x\n+++ b/x\n")
+
+    token = _TOKEN_RE.search(sock.sent).group()
+    assert b"<<'" + token + b"'\n--- a/x\n+++ b/x\n" + token + b"\n" in sock.sent
+
+
+@pytest.mark.parametrize("stdin, sent", [(None, b""), ("", b""), ("patch", b"patch")])
+def test_communicate_writes_stdin_and_closes_write_side(stdin, sent):
+    sock = FakeSocket()
+    sock.pending = frame(1, b"out") + frame(2, b"err")
+
+    assert _SandboxShell(sock).communicate(stdin, timeout=5) == (b"out", b"err")
+    assert sock.sent == sent
+    assert sock.write_closed
+
+
+class FakeDockerAPI:
+    def __init__(self, sockets: list):
+        self.sockets = sockets
+        self.created: list[list[str]] = []
+
+    def exec_create(self, container_id: str, command: list[str], **kwargs) -> dict:
+        self.created.append(command)
+        return {"Id": f"exec-{len(self.created)}"}
+
+    def exec_start(self, exec_id: str, socket: bool = False):
+        sock = self.sockets.pop(0)
+        if isinstance(sock, Exception):
+            raise sock
+        return sock
+
+    def exec_inspect(self, exec_id: str) -> dict:
+        return {"ExitCode": 0}
+
+
+def make_manager(sockets: list) -> tuple[DockerSandboxManager, FakeDockerAPI]:
+    api = FakeDockerAPI(sockets)
+    manager = DockerSandboxManager(client=SimpleNamespace(api=api))
+    manager._containers["sb"] = SimpleNamespace(id="container")
+    return manager, api
+
+
+def test_dead_shell_does_not_rerun_command():
+    sock = FakeSocket(lambda token: frame(1, b"half"))
+    manager, api = make_manager([sock])
+
+    result = manager.execute_in_sandbox("sb", ["git", "apply"], stdin="patch")
+
+    assert not result.success
+    assert api.created == [["/bin/sh"]]
+    assert sock.closed
+    assert "sb" not in manager._shells
+
+
+def test_timeout_closes_shell():
+    sock = FakeSocket(hang=True)
+    manager, _ = make_manager([sock])
+
+    result = manager.execute_in_sandbox("sb", ["sleep", "10"], timeout=5)
+
+    assert not result.success
+    assert "timed out" in result.stderr
+    assert sock.closed
+    assert "sb" not in manager._shells
+
+
+def test_falls_back_to_single_exec_when_shell_cannot_start():
+    exec_sock = FakeSocket()
+    exec_sock.pending = frame(1, b"applied")
+    manager, api = make_manager([OSError("no shell"), exec_sock])
+
+    result = manager.execute_in_sandbox("sb", ["git", "apply"], stdin="patch")
+
+    assert result.success
+    assert result.stdout == "applied"
+    assert api.created == [["/bin/sh"], ["git", "apply"]]
+    assert exec_sock.sent == b"patch"
@@ -1,8 +1,18 @@
+from dataclasses import replace
+
+import pytest
+
 from src.scoring.engine import ScoringEngine, ScoringWeights, ScoringThresholds
 from src.agent.state import CheckResult, CheckDetail, Decision
 from datetime import datetime
 
 
+pytestmark = pytest.mark.unit
+
+
+CHECK_TIMESTAMP = datetime(2024, 1, 1)
+
+
 def make_check_result(name: str, passed: bool, errors: int = 0, warnings: int = 0) -> CheckResult:
     return CheckResult(
         check_name=name,
@@ -10,73 +20,51 @@ def make_check_result(name: str, passed: bool, errors: int = 0, warnings: int =
         output="",
         error_count=errors,
         warning_count=warnings,
-        details=[],
         duration_ms=100,
-        timestamp=datetime.utcnow(),
+        timestamp=CHECK_TIMESTAMP,
     )
 
 
-def test_scoring_engine_all_passed():
-    engine = ScoringEngine()
-    
-    check_results = {
-        "tests": make_check_result("tests", True),
-        "lint": make_check_result("lint", True),
-        "typecheck": make_check_result("typecheck", True),
-        "security": make_check_result("security", True),
+CHECK_NAMES = ("tests", "lint", "typecheck", "security")
+ALL_PASSING = {name: make_check_result(name, True) for name in CHECK_NAMES}
+
+
+def make_check_results(**overrides: tuple[bool, int, int]) -> dict[str, CheckResult]:
+    return {
+        **ALL_PASSING,
+        **{
+            name: make_check_result(name, passed, errors=errors, warnings=warnings)
+            for name, (passed, errors, warnings) in overrides.items()
+        },
     }
-    
-    result = engine.compute_scores(check_results)
+
+
+def test_scoring_engine_all_passed(scoring_engine):
+    result = scoring_engine.compute_scores(make_check_results())
     
     assert result.quality_score == 100.0
     assert result.decision == Decision.AUTO_APPROVE
 
 
-def test_scoring_engine_tests_failed():
-    engine = ScoringEngine()
-    
-    check_results = {
-        "tests": make_check_result("tests", False, errors=2),
-        "lint": make_check_result("lint", True),
-        "typecheck": make_check_result("typecheck", True),
-        "security": make_check_result("security", True),
-    }
-    
-    result = engine.compute_scores(check_results)
+def test_scoring_engine_tests_failed(scoring_engine):
+    result = scoring_engine.compute_scores(make_check_results(tests=(False, 2, 0)))
     
     assert result.decision == Decision.REJECT
     assert "Tests failed" in result.gate_failures
 
 
-def test_scoring_engine_lint_warnings():
-    engine = ScoringEngine()
-    
-    check_results = {
-        "tests": make_check_result("tests", True),
-        "lint": make_check_result("lint", True, warnings=5),
-        "typecheck": make_check_result("typecheck", True),
-        "security": make_check_result("security", True),
-    }
-    
-    result = engine.compute_scores(check_results)
+def test_scoring_engine_lint_warnings(scoring_engine):
+    result = scoring_engine.compute_scores(make_check_results(lint=(True, 0, 5)))
     
     assert result.quality_score < 100.0
     assert result.scores.lint_score < 100.0
 
 
-def test_scoring_engine_security_critical():
-    engine = ScoringEngine()
-    
-    check_results = {
-        "tests": make_check_result("tests", True),
-        "lint": make_check_result("lint", True),
-        "typecheck": make_check_result("typecheck", True),
-        "security": make_check_result("security", False, errors=1),
-    }
+def test_scoring_engine_security_critical(scoring_engine):
+    check_results = make_check_results(security=(False, 1, 0))
+    check_results["security"] = replace(check_results["security"], has_critical_failure=True)
     
-    check_results["security"].has_critical_failure = True
-    
-    result = engine.compute_scores(check_results)
+    result = scoring_engine.compute_scores(check_results)
     
     assert result.decision == Decision.REJECT
 
@@ -89,12 +77,7 @@ def test_scoring_engine_quality_thresholds():
         )
     )
     
-    check_results = {
-        "tests": make_check_result("tests", True),
-        "lint": make_check_result("lint", True, warnings=10),
-        "typecheck": make_check_result("typecheck", True, errors=3),
-        "security": make_check_result("security", True),
-    }
+    check_results = make_check_results(lint=(True, 0, 10), typecheck=(True, 3, 0))
     
     result = engine.compute_scores(check_results)
     
@@ -1,8 +1,13 @@
 import pytest
+from datetime import datetime
 from pathlib import Path
+from src.agent.state import CheckResult
 from src.validation.pipeline import ValidationPipeline, ValidationConfig
 
 
+pytestmark = pytest.mark.unit
+
+
 def test_validation_config_defaults():
     config = ValidationConfig()
     
@@ -19,20 +24,13 @@ def test_validation_config_disabled():
     )
     
     pipeline = ValidationPipeline(config)
-    check_names = [name for name, _ in pipeline._checks]
     
-    assert "tests" not in check_names
-    assert "security" not in check_names
-    assert "lint" in check_names
+    assert "tests" not in pipeline.check_names
+    assert "security" not in pipeline.check_names
+    assert "lint" in pipeline.check_names
 
 
-@pytest.mark.asyncio
-async def test_pipeline_summary():
-    from src.agent.state import CheckResult
-    from datetime import datetime
-    
-    pipeline = ValidationPipeline()
-    
+def test_pipeline_summary(pipeline):
     results = {
         "tests": CheckResult(
             check_name="tests",
@@ -40,7 +38,6 @@ async def test_pipeline_summary():
             output="",
             error_count=0,
             warning_count=0,
-            details=[],
             duration_ms=100,
             timestamp=datetime.utcnow(),
         ),
@@ -50,7 +47,6 @@ async def test_pipeline_summary():
             output="",
             error_count=0,
             warning_count=2,
-            details=[],
             duration_ms=50,
             timestamp=datetime.utcnow(),
         ),
@@ -62,3 +58,22 @@ async def test_pipeline_summary():
     assert summary["passed"] == 2
     assert summary["total_warnings"] == 2
     assert summary["all_passed"] is True
+
+
+def test_pytest_output_counts_summary():
+    from src.validation.checks.base import PytestRunner
+
+    output = "\n".join(
+        [
+            "tests/unit/test_a.py::test_one FAILED",
+            "E   AssertionError: login failed",
+            "FAILED tests/unit/test_a.py::test_one - AssertionError",
+            "1 failed, 2 passed, 1 error in 0.12s",
+        ]
+    )
+
+    error_count, warning_count, details = PytestRunner()._parse_output(output)
+
+    assert error_count == 2
+    assert warning_count == 0
+    assert [detail.file_path for detail in details] == ["tests/unit/test_a.py"] * 2